@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+'''
+Generate XML
+Writes synthetic Assimilate Scratch selection XML files for benchmarking the Scratch2Fusion and Scratch2Resolve scripts.
+
+The documents follow the schema that ScratchXML.IterShots() and ScratchXML.ParseShot() read: the project attributes, the output resolution and frame rate, and a selection of shots with handles, size, notes, and a colorgrade block. Shots are spread over several layers, and a mix of image sequences and movie files is used.
+
+Usage:
+python3 GenerateXML.py 1000 /tmp/scratch-1000.xml
+'''
+
+import argparse, random
+from xml.sax.saxutils import quoteattr, escape
+
+# Image sequence and movie formats used for the synthetic shots
+FORMATS = ('exr', 'dpx', 'mov')
+
+def Timecode(frame, fps):
+	seconds, frames = divmod(frame, fps)
+	minutes, seconds = divmod(seconds, 60)
+	hours, minutes = divmod(minutes, 60)
+	return '%02d:%02d:%02d:%02d' % (hours, minutes, seconds, frames)
+
+def Shot(index, slot, layer, rng, media_path, fps):
+	file_format = FORMATS[index % len(FORMATS)]
+	length = rng.randint(24, 240)
+	start = 1001 if file_format != 'mov' else 0
+	name = 'SH%05d' % index
+	if file_format == 'mov':
+		filepath = media_path + '/' + name + '/' + name + '.mov'
+	else:
+		filepath = media_path + '/' + name + '/' + name + '.%04d.' % start + file_format
+
+	lines = []
+	lines.append('\t\t<shot uuid=%s type="clip" slot="%d" slot_len="%d" layer="%d">' % (quoteattr('%08x-0000-4000-8000-%012x' % (index, index)), slot, length, layer))
+	lines.append('\t\t\t<file>%s</file>' % escape(filepath))
+	lines.append('\t\t\t<name>%s[001]</name>' % name)
+	lines.append('\t\t\t<reel_id>R%03d</reel_id>' % (index // 50 + 1))
+	lines.append('\t\t\t<handles><in>%d</in><out>%d</out></handles>' % (start, start + length - 1))
+	lines.append('\t\t\t<length>%d</length>' % length)
+	lines.append('\t\t\t<size><width>1920</width><height>1080</height></size>')
+	lines.append('\t\t\t<aspect>1</aspect>')
+	lines.append('\t\t\t<fps>%d</fps>' % fps)
+	lines.append('\t\t\t<timecode>%s</timecode>' % Timecode(86400 + slot, fps))
+	lines.append('\t\t\t<colorgrade>')
+	lines.append('\t\t\t\t<input>')
+	for control, base in (('lift', 0.0), ('gamma', 1.0), ('gain', 1.0)):
+		values = [base + rng.uniform(-0.05, 0.05) for channel in range(3)]
+		lines.append('\t\t\t\t\t<%s r="%.4f" g="%.4f" b="%.4f"/>' % ((control,) + tuple(values)))
+	lines.append('\t\t\t\t\t<saturation>%.4f</saturation>' % rng.uniform(0.8, 1.2))
+	lines.append('\t\t\t\t</input>')
+	lines.append('\t\t\t</colorgrade>')
+	if index % 3 == 0:
+		lines.append('\t\t\t<notes><note status="%d">Note for %s</note></notes>' % (rng.randint(0, 9), name))
+	lines.append('\t\t</shot>')
+	return '\n'.join(lines)
+
+def GenerateXML(xml_path, shots, layers=3, fps=24, seed=1):
+	rng = random.Random(seed)
+	media_path = '/Volumes/Media/Benchmark'
+
+	with open(xml_path, 'w', encoding='utf-8') as xml_file:
+		xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+		xml_file.write('<scratch datetime="2024-04-08 13:39" version="9.7" project="Benchmark" project_path="/Volumes/Projects/Benchmark" media_path=%s temp_path="/tmp" watch_folder="">\n' % quoteattr(media_path))
+		xml_file.write('\t<output><resolution><w>1920</w><h>1080</h></resolution><fps>%d</fps></output>\n' % fps)
+		xml_file.write('\t<selection group="Benchmark" construct="Construct %d">\n' % shots)
+
+		slot = 0
+		for index in range(shots):
+			layer = index % layers
+			xml_file.write(Shot(index, slot, layer, rng, media_path, fps) + '\n')
+			if layer == layers - 1:
+				slot += rng.randint(24, 120)
+
+		xml_file.write('\t</selection>\n')
+		xml_file.write('</scratch>\n')
+	return xml_path
+
+def Main():
+	parser = argparse.ArgumentParser(description='Write a synthetic Assimilate Scratch selection XML file.')
+	parser.add_argument('shots', type=int, help='The number of shots in the selection')
+	parser.add_argument('xml_path', help='The XML file to write')
+	parser.add_argument('--layers', type=int, default=3, help='The number of Construct layers the shots are spread over')
+	parser.add_argument('--fps', type=int, default=24)
+	parser.add_argument('--seed', type=int, default=1)
+	args = parser.parse_args()
+
+	GenerateXML(args.xml_path, args.shots, layers=args.layers, fps=args.fps, seed=args.seed)
+	print('[XML Written] ' + args.xml_path)
+
+if __name__ == '__main__':
+	Main()
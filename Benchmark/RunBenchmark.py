@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+'''
+Run Benchmark
+Measures the import throughput of the Scratch2Fusion and Scratch2Resolve scripts on plain Linux, without Fusion or Resolve.
+
+Synthetic Scratch XML files are written with GenerateXML.py, and the scripts are connected to the local fusionscript stand-in that counts each scripting call and can add a per-call latency. For every selection size the report lists the XML parse time, the import time, and the number of scripting calls made.
+
+Each import mode is also checked against the state it leaves in the stand-in: the Loader and ColorCorrector nodes or the media pool items and timeline clips, the number of Paste or ImportMedia calls, and a --sync run of the same file that must not add anything, with about the same number of calls for the pipelined import as for the batched one. The benchmark exits with an error when a check fails.
+
+Usage:
+python3 RunBenchmark.py
+python3 RunBenchmark.py --sizes 10 100 1000 10000 --latency 0.0005 --json results.json
+python3 RunBenchmark.py --hosts fusion --fan-out 1 2 4 --latency 0.01
+python3 RunBenchmark.py --hosts fusion --pipeline --latency 0.01
+python3 RunBenchmark.py --sizes 10 --startup
+python3 RunBenchmark.py --sizes 1000 10000 --cache
+'''
+
+import sys, os, argparse, json, tempfile, time, subprocess, statistics
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'Script')
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(1, SCRIPT_DIR)
+
+# Use the stand-in library for every fusionscript connection
+import fusionscript
+sys.modules['fusionscript'] = fusionscript
+
+import GenerateXML
+import ScratchXML, ScratchCache
+
+def Quiet():
+	# Keep the per-clip output of the scripts out of the report
+	return open(os.devnull, 'w')
+
+def TimeParse(module, xml):
+	start = time.perf_counter()
+	project = ScratchXML.Project()
+	shots = [ScratchXML.ParseShot(elem) for elem in ScratchXML.IterShots(xml, project)]
+	return time.perf_counter() - start, len(shots)
+
+def TimeCachedParse(xml):
+	# Read the XML file through the parse cache twice: the first read fills the cache and the second one is served from
+	# it. Returns the two times, and whether the cached shots match the parsed ones.
+	os.environ[ScratchCache.CACHE_ENV] = str(ScratchCache.DEFAULT_CACHE_MB)
+	times = []
+	reads = []
+	try:
+		for run in range(2):
+			start = time.perf_counter()
+			reads.append(ScratchCache.ReadShots(xml, ScratchXML.Project()))
+			times.append(time.perf_counter() - start)
+	finally:
+		cache_path = ScratchCache.CachePath(xml)
+		os.remove(cache_path)
+		if not os.listdir(os.path.dirname(cache_path)):
+			os.rmdir(os.path.dirname(cache_path))
+		os.environ[ScratchCache.CACHE_ENV] = '0'
+	return times, [repr(shot) for shot in reads[0]] == [repr(shot) for shot in reads[1]]
+
+def Import(module, xml, options, connect=True):
+	# Run an import with the script output hidden. Returns the elapsed time.
+	stdout = sys.stdout
+	sys.stdout = Quiet()
+	try:
+		start = time.perf_counter()
+		if connect and hasattr(module, 'Connect'):
+			module.Connect()
+		module.XML_Selection(xml, **options)
+		return time.perf_counter() - start
+	finally:
+		sys.stdout.close()
+		sys.stdout = stdout
+
+def TimeImport(module, xml, latency, options):
+	# Each import starts with an empty comp or project
+	fusionscript.Restart()
+	fusionscript.Reset(latency)
+	module.session.Reset()
+	return Import(module, xml, options), fusionscript.CallCount()
+
+# The chunk size of the pipelined import
+PIPELINE_CHUNK = 200
+
+def Expect(problems, label, actual, expected):
+	if actual != expected:
+		problems.append(label + ': ' + str(actual) + ', expected ' + str(expected))
+
+def HostState(host, module):
+	# The nodes or media pool items and timeline clips the import left in the stand-in, read without counting calls
+	if host == 'Fusion':
+		tool_ids = [tool.ID for tool in module.comp.tools]
+		return {'Loader': tool_ids.count('Loader'), 'ColorCorrector': tool_ids.count('ColorCorrector')}
+	mediapool = module.GetMediaPool()
+	state = {
+		'media pool items': sum(len(folder.clips) for folder in mediapool.Folders(mediapool.root)),
+		'timelines': len(mediapool.timelines),
+	}
+	if mediapool.timelines:
+		items = mediapool.timelines[-1].items
+		state['timeline clips'] = len(items)
+		state['graded timeline clips'] = sum(1 for item in items if item.cdl)
+	return state
+
+def CheckImport(host, module, xml, mode, options, shots, graded):
+	# Import into a new stand-in session and sync the same file again. Returns the problems found and the number of
+	# calls made by the sync.
+	problems = []
+	label = host + ' ' + mode
+	if host == 'Resolve':
+		options = dict(options, timeline=True)
+	chunks = -(-shots // PIPELINE_CHUNK)
+
+	fusionscript.Restart()
+	fusionscript.Reset()
+	module.session.Reset()
+	Import(module, xml, options)
+	state = HostState(host, module)
+	if host == 'Fusion':
+		Expect(problems, label + ' Loader nodes', state['Loader'], shots)
+		Expect(problems, label + ' ColorCorrector nodes', state['ColorCorrector'], graded)
+		pastes = {'batch': 1, 'per-clip': 0, 'pipeline': chunks}[mode]
+		Expect(problems, label + ' Paste calls', fusionscript.calls['Paste'], pastes)
+		if mode == 'per-clip':
+			Expect(problems, label + ' ConnectInput calls', fusionscript.calls['ConnectInput'], graded)
+	else:
+		Expect(problems, label + ' media pool items', state['media pool items'], shots)
+		imports = {'batch': 1, 'per-clip': shots, 'pipeline': chunks}[mode]
+		Expect(problems, label + ' ImportMedia calls', fusionscript.calls['ImportMedia'], imports)
+		Expect(problems, label + ' timelines', state['timelines'], 1)
+		Expect(problems, label + ' timeline clips', state.get('timeline clips'), shots)
+		Expect(problems, label + ' graded timeline clips', state.get('graded timeline clips'), graded)
+
+	# Nothing changed, so a sync must not add nodes, media, or timelines
+	fusionscript.Reset()
+	Import(module, xml, dict(options, sync=True), connect=False)
+	Expect(problems, label + ' --sync state', HostState(host, module), state)
+	for name in ('Paste', 'AddTool', 'ImportMedia', 'CreateEmptyTimeline', 'DeleteClips', 'MoveClips'):
+		Expect(problems, label + ' --sync ' + name + ' calls', fusionscript.calls[name], 0)
+	return problems, fusionscript.CallCount()
+
+def CheckSizes(modules, xml, modes, shots, graded):
+	# Check every mode of every host. A pipelined sync may add a call or so per chunk to the calls of a batched sync.
+	problems = []
+	for host, module in modules.items():
+		sync_calls = {}
+		for mode, options in modes:
+			mode_problems, sync_calls[mode] = CheckImport(host, module, xml, mode, options, shots, graded)
+			problems.extend(mode_problems)
+		if 'pipeline' in sync_calls and sync_calls['pipeline'] > sync_calls['batch'] + -(-shots // PIPELINE_CHUNK):
+			problems.append(host + ' pipeline --sync calls: ' + str(sync_calls['pipeline']) + ', expected about ' + str(sync_calls['batch']))
+	return problems
+
+def TimeFanOut(module, xml, latency, host_count):
+	# Import with Scratch2Fusion --hosts, one comp per reel, spread over host_count stand-in Fusion hosts
+	fusionscript.Reset(latency)
+
+	stdout = sys.stdout
+	sys.stdout = Quiet()
+	try:
+		start = time.perf_counter()
+		module.XML_Hosts([xml], ['fusion-' + str(index + 1) for index in range(host_count)], 'reel')
+		elapsed = time.perf_counter() - start
+	finally:
+		sys.stdout.close()
+		sys.stdout = stdout
+	return elapsed, fusionscript.CallCount()
+
+# Script files of each host, and the number of runs used for each startup measurement
+SCRIPTS = {
+	'Fusion': 'Scratch2Fusion.py',
+	'Resolve': 'Scratch2Resolve.py',
+}
+STARTUP_RUNS = 5
+
+def TimeStartup(host, args):
+	# Median wall time of a fresh interpreter running the script with these arguments
+	times = []
+	for run in range(STARTUP_RUNS):
+		start = time.perf_counter()
+		subprocess.run([sys.executable, os.path.join(SCRIPT_DIR, SCRIPTS[host])] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+		times.append(time.perf_counter() - start)
+	return statistics.median(times)
+
+def LoadHosts(hosts):
+	modules = {}
+	stdout = sys.stdout
+	sys.stdout = Quiet()
+	try:
+		if 'fusion' in hosts:
+			import Scratch2Fusion
+			modules['Fusion'] = Scratch2Fusion
+		if 'resolve' in hosts:
+			import Scratch2Resolve
+			modules['Resolve'] = Scratch2Resolve
+	finally:
+		sys.stdout.close()
+		sys.stdout = stdout
+	return modules
+
+def Main():
+	parser = argparse.ArgumentParser(description='Benchmark the Scratch2Fusion and Scratch2Resolve importers against a local fusionscript stand-in.')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help='The selection sizes to test')
+	parser.add_argument('--hosts', nargs='+', choices=['fusion', 'resolve'], default=['fusion', 'resolve'])
+	parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every scripting call')
+	parser.add_argument('--per-clip', action='store_true', help='Also measure the per-clip import path')
+	parser.add_argument('--pipeline', action='store_true', help='Also measure the pipelined import, which parses on a separate thread')
+	parser.add_argument('--fan-out', type=int, nargs='+', default=[], metavar='HOSTS', help='Also measure the Fusion --hosts import, split by reel, over this many hosts')
+	parser.add_argument('--cache', action='store_true', help='Also measure the parse time with an empty and a filled parsed XML cache')
+	parser.add_argument('--startup', action='store_true', help='Also measure the startup time of each script for --help and for an invalid XML file')
+	parser.add_argument('--json', metavar='JSON_PATH', help='Save the results to a JSON file')
+	args = parser.parse_args()
+
+	# The import times include the XML parsing, so the parse cache is only used by --cache
+	os.environ[ScratchCache.CACHE_ENV] = '0'
+
+	modules = LoadHosts(args.hosts)
+	modes = [('batch', {})]
+	if args.per_clip:
+		modes.append(('per-clip', {'batch': False}))
+	if args.pipeline:
+		modes.append(('pipeline', {'pipeline': PIPELINE_CHUNK}))
+
+	results = []
+	cache_results = []
+	problems = []
+	with tempfile.TemporaryDirectory() as temp_dir:
+		for size in args.sizes:
+			xml = GenerateXML.GenerateXML(os.path.join(temp_dir, 'scratch-' + str(size) + '.xml'), size)
+			if args.cache:
+				(miss_time, hit_time), same = TimeCachedParse(xml)
+				if not same:
+					problems.append('The cached shots of ' + str(size) + ' shots differ from the parsed ones')
+				cache_results.append({'case': 'cache', 'shots': size, 'miss_seconds': miss_time, 'hit_seconds': hit_time})
+			for host, module in modules.items():
+				parse_time, shots = TimeParse(module, xml)
+				for mode, options in modes:
+					import_time, rpc_calls = TimeImport(module, xml, args.latency, options)
+					results.append({
+						'host': host,
+						'mode': mode,
+						'shots': shots,
+						'parse_seconds': parse_time,
+						'import_seconds': import_time,
+						'rpc_calls': rpc_calls,
+					})
+				if host == 'Fusion':
+					for host_count in args.fan_out:
+						import_time, rpc_calls = TimeFanOut(module, xml, args.latency, host_count)
+						results.append({
+							'host': host,
+							'mode': 'hosts-' + str(host_count),
+							'shots': shots,
+							'parse_seconds': parse_time,
+							'import_seconds': import_time,
+							'rpc_calls': rpc_calls,
+						})
+			graded = sum(1 for shot in ScratchCache.ReadShots(xml, ScratchXML.Project()) if shot.grade is not None)
+			problems.extend(CheckSizes(modules, xml, modes, size, graded))
+
+	print('%-8s %-9s %7s %11s %12s %10s' % ('Host', 'Mode', 'Shots', 'Parse (s)', 'Import (s)', 'RPC Calls'))
+	for result in results:
+		print('%-8s %-9s %7d %11.4f %12.4f %10d' % (result['host'], result['mode'], result['shots'], result['parse_seconds'], result['import_seconds'], result['rpc_calls']))
+
+	if cache_results:
+		print('\n%-7s %12s %12s' % ('Shots', 'Miss (s)', 'Hit (s)'))
+		for result in cache_results:
+			print('%7d %12.4f %12.4f' % (result['shots'], result['miss_seconds'], result['hit_seconds']))
+		results.extend(cache_results)
+
+	if args.startup:
+		startup = []
+		with tempfile.TemporaryDirectory() as temp_dir:
+			invalid_xml = os.path.join(temp_dir, 'invalid.xml')
+			with open(invalid_xml, 'w') as xml_file:
+				xml_file.write('<scratch>\n')
+			for host in modules:
+				startup.append({'host': host, 'case': 'help', 'seconds': TimeStartup(host, ['--help'])})
+				startup.append({'host': host, 'case': 'invalid xml', 'seconds': TimeStartup(host, [invalid_xml])})
+
+		print('\n%-8s %-12s %11s' % ('Host', 'Startup', 'Seconds'))
+		for result in startup:
+			print('%-8s %-12s %11.4f' % (result['host'], result['case'], result['seconds']))
+		results.extend(startup)
+
+	if args.json:
+		with open(args.json, 'w') as json_file:
+			json.dump(results, json_file, indent='\t')
+		print('[Results Written] ' + args.json)
+
+	for problem in problems:
+		print('[Check Failed] ' + problem)
+	if problems:
+		sys.exit(1)
+	print('[Checks Passed]')
+
+if __name__ == '__main__':
+	Main()
@@ -0,0 +1,377 @@
+'''
+fusionscript stand-in
+A local replacement for the BMD fusionscript library that is used to benchmark the Scratch2Fusion and Scratch2Resolve scripts without Fusion or Resolve.
+
+Every scripting call made through the objects returned by scriptapp() is counted, and an optional per-call latency can be injected to simulate the cost of the round trip to the host application. Load it by inserting the module into sys.modules['fusionscript'] before the scripts connect.
+'''
+
+import time, threading, collections
+
+# Seconds added to every scripting call
+LATENCY = 0.0
+
+# Number of scripting calls by method name
+calls = collections.Counter()
+_lock = threading.Lock()
+
+# Bumped by Restart(). The apps returned by earlier scriptapp() calls stop answering GetVersion(), like a host
+# application that was restarted, so the scripts connect again to a new app with an empty comp or project.
+generation = 0
+
+def Restart():
+	global generation
+	generation += 1
+
+def Reset(latency=0.0):
+	global LATENCY
+	LATENCY = latency
+	with _lock:
+		calls.clear()
+
+def CallCount():
+	with _lock:
+		return sum(calls.values())
+
+def Call(name):
+	with _lock:
+		calls[name] += 1
+	if LATENCY:
+		time.sleep(LATENCY)
+
+class ScriptObject:
+	# Unknown methods are accepted, counted, and return another ScriptObject
+	def __getattr__(self, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		def Method(*args, **kwargs):
+			Call(name)
+			return ScriptObject()
+		return Method
+
+class Input:
+	# A tool input, set with tool.Clip[fu.TIME_UNDEFINED] = value
+	def __init__(self, tool, name):
+		self.tool = tool
+		self.name = name
+
+	def __setitem__(self, time_value, value):
+		Call('SetInput')
+		self.tool.inputs[self.name] = value
+
+	def __getitem__(self, time_value):
+		Call('GetInput')
+		return self.tool.inputs.get(self.name)
+
+# The Tool methods of the Fusion scripting API that are not named Get* or Set*. Any other capitalized attribute of a
+# tool is one of its inputs.
+TOOL_METHODS = (
+	'AddModifier', 'ConnectInput', 'Delete', 'FindMainInput', 'FindMainOutput', 'LoadSettings', 'Refresh',
+	'SaveSettings', 'ShowControlPage', 'ViewOn',
+)
+
+class Tool(ScriptObject):
+	def __init__(self, tool_id, name, settings=None):
+		object.__setattr__(self, 'ID', tool_id)
+		object.__setattr__(self, 'Name', name)
+		object.__setattr__(self, 'inputs', {})
+		object.__setattr__(self, 'data', dict((settings or {}).get('CustomData', {})))
+
+	def __getattr__(self, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		if name[0].isupper() and name not in TOOL_METHODS and not name.startswith(('Get', 'Set')):
+			return Input(self, name)
+		return ScriptObject.__getattr__(self, name)
+
+	def __setattr__(self, name, value):
+		Call('Set' + name)
+		self.inputs[name] = value
+
+	def GetData(self, name=None):
+		Call('GetData')
+		if name is None:
+			return self.data
+		return self.data.get(name)
+
+	def SetData(self, name, value):
+		Call('SetData')
+		self.data[name] = value
+
+	def ConnectInput(self, name, tool):
+		Call('ConnectInput')
+		self.inputs[name] = tool
+		return True
+
+class FlowView(ScriptObject):
+	def Select(self, *args):
+		Call('Select')
+
+	def SetPos(self, tool, x, y):
+		Call('SetPos')
+
+class Frame(ScriptObject):
+	@property
+	def FlowView(self):
+		Call('FlowView')
+		return FlowView()
+
+class Comp(ScriptObject):
+	def __init__(self):
+		self.tools = []
+
+	@property
+	def CurrentFrame(self):
+		Call('CurrentFrame')
+		return Frame()
+
+	def AddTool(self, tool_id, x=-32768, y=-32768):
+		Call('AddTool')
+		tool = Tool(tool_id, tool_id + str(len(self.tools) + 1))
+		self.tools.append(tool)
+		return tool
+
+	def Paste(self, settings):
+		Call('Paste')
+		for name, tool_settings in settings.get('Tools', {}).items():
+			self.tools.append(Tool(tool_settings.get('__ctor'), name, tool_settings))
+		return True
+
+	def GetToolList(self, selected=False, tool_type=None):
+		Call('GetToolList')
+		tools = [tool for tool in self.tools if tool_type is None or tool.ID == tool_type]
+		return dict(enumerate(tools, 1))
+
+	def MapPath(self, path):
+		Call('MapPath')
+		return path
+
+	def GetPrefs(self, name=None):
+		Call('GetPrefs')
+		return {}
+
+class App(ScriptObject):
+	def __init__(self):
+		self.generation = generation
+
+	def GetVersion(self):
+		Call('GetVersion')
+		if self.generation != generation:
+			return None
+		return [19, 0, 0]
+
+class Fusion(App):
+	TIME_UNDEFINED = -1000000000.0
+
+	def GetCurrentComp(self):
+		Call('GetCurrentComp')
+		return Comp()
+
+	def NewComp(self, *args):
+		Call('NewComp')
+		return Comp()
+
+	def GetPrefs(self, name=None):
+		Call('GetPrefs')
+		return {}
+
+class MediaPoolItem(ScriptObject):
+	def __init__(self, clip_info):
+		self.clip_info = clip_info
+		self.metadata = {}
+
+	def GetClipProperty(self, name=None):
+		Call('GetClipProperty')
+		if name == 'File Path':
+			return self.clip_info.get('FilePath')
+		return ''
+
+	def GetThirdPartyMetadata(self, name=None):
+		Call('GetThirdPartyMetadata')
+		if name is None:
+			return dict(self.metadata)
+		return self.metadata.get(name, '')
+
+	def SetThirdPartyMetadata(self, values, value=None):
+		Call('SetThirdPartyMetadata')
+		if isinstance(values, dict):
+			self.metadata.update(values)
+		else:
+			self.metadata[values] = value
+		return True
+
+class Folder(ScriptObject):
+	def __init__(self, name):
+		self.name = name
+		self.clips = []
+		self.folders = []
+
+	def GetName(self):
+		Call('GetName')
+		return self.name
+
+	def GetClipList(self):
+		Call('GetClipList')
+		return list(self.clips)
+
+	def GetSubFolderList(self):
+		Call('GetSubFolderList')
+		return list(self.folders)
+
+class Timeline(ScriptObject):
+	def __init__(self, name):
+		self.name = name
+		self.tracks = 1
+		self.markers = {}
+		self.items = []
+
+	def GetName(self):
+		Call('GetName')
+		return self.name
+
+	def GetStartFrame(self):
+		Call('GetStartFrame')
+		return 86400
+
+	def GetTrackCount(self, track_type):
+		Call('GetTrackCount')
+		return self.tracks
+
+	def AddTrack(self, track_type, *args):
+		Call('AddTrack')
+		self.tracks += 1
+		return True
+
+	def AddMarker(self, frame, color, name, note, duration, custom_data=''):
+		Call('AddMarker')
+		self.markers[frame] = {'color': color, 'duration': duration, 'note': note, 'name': name, 'customData': custom_data}
+		return True
+
+	def GetMarkers(self):
+		Call('GetMarkers')
+		return dict(self.markers)
+
+class TimelineItem(ScriptObject):
+	def __init__(self, clip_info):
+		self.clip_info = clip_info
+		self.cdl = None
+
+	def GetStart(self):
+		Call('GetStart')
+		return self.clip_info.get('recordFrame')
+
+	def GetTrackTypeAndIndex(self):
+		Call('GetTrackTypeAndIndex')
+		return ['video', self.clip_info.get('trackIndex')]
+
+	def SetCDL(self, cdl):
+		Call('SetCDL')
+		self.cdl = cdl
+		return True
+
+class MediaPool(ScriptObject):
+	def __init__(self):
+		self.root = Folder('Master')
+		self.current = self.root
+		self.timelines = []
+
+	def GetRootFolder(self):
+		Call('GetRootFolder')
+		return self.root
+
+	def GetCurrentFolder(self):
+		Call('GetCurrentFolder')
+		return self.current
+
+	def SetCurrentFolder(self, folder):
+		Call('SetCurrentFolder')
+		self.current = folder
+		return True
+
+	def AddSubFolder(self, parent, name):
+		Call('AddSubFolder')
+		folder = Folder(name)
+		parent.folders.append(folder)
+		return folder
+
+	def ImportMedia(self, items):
+		Call('ImportMedia')
+		mpItems = [MediaPoolItem(item if isinstance(item, dict) else {'FilePath': item}) for item in items]
+		self.current.clips.extend(mpItems)
+		return mpItems
+
+	def DeleteClips(self, mpItems):
+		Call('DeleteClips')
+		for folder in self.Folders(self.root):
+			folder.clips = [mpItem for mpItem in folder.clips if mpItem not in mpItems]
+		return True
+
+	def MoveClips(self, mpItems, folder):
+		Call('MoveClips')
+		for source in self.Folders(self.root):
+			source.clips = [mpItem for mpItem in source.clips if mpItem not in mpItems]
+		folder.clips.extend(mpItems)
+		return True
+
+	def CreateEmptyTimeline(self, name):
+		Call('CreateEmptyTimeline')
+		if any(timeline.name == name for timeline in self.timelines):
+			return None
+		timeline = Timeline(name)
+		self.timelines.append(timeline)
+		return timeline
+
+	def AppendToTimeline(self, clip_infos):
+		# The clips go onto the newest timeline, which Resolve makes the current one when it is created
+		Call('AppendToTimeline')
+		items = [TimelineItem(clip_info) for clip_info in clip_infos]
+		if self.timelines:
+			self.timelines[-1].items.extend(items)
+		return items
+
+	def Folders(self, folder):
+		yield folder
+		for child in folder.folders:
+			yield from self.Folders(child)
+
+class Project(ScriptObject):
+	def __init__(self):
+		self.mediapool = MediaPool()
+
+	def GetMediaPool(self):
+		Call('GetMediaPool')
+		return self.mediapool
+
+	def GetName(self):
+		Call('GetName')
+		return 'Benchmark'
+
+	def GetTimelineCount(self):
+		Call('GetTimelineCount')
+		return len(self.mediapool.timelines)
+
+	def GetTimelineByIndex(self, index):
+		Call('GetTimelineByIndex')
+		return self.mediapool.timelines[index - 1]
+
+class ProjectManager(ScriptObject):
+	def __init__(self):
+		self.project = Project()
+
+	def GetCurrentProject(self):
+		Call('GetCurrentProject')
+		return self.project
+
+class Resolve(App):
+	def __init__(self):
+		App.__init__(self)
+		self.project_manager = ProjectManager()
+
+	def GetProjectManager(self):
+		Call('GetProjectManager')
+		return self.project_manager
+
+def scriptapp(host, address='localhost', *args):
+	Call('scriptapp')
+	if host == 'Resolve':
+		return Resolve()
+	return Fusion()
@@ -6,7 +6,7 @@ By Andrew Hazelden <andrew@andrewhazelden.com>
 # Overview:
 This script imports Assimilate Scratch/LiveFX content into BMD Fusion Studio.
 
-Each clip is created as a Loader node in Fusion. The filename, tile color, and comment attributes are assigned to each node.
+Each clip is created as a Loader node in Fusion. The filename, tile color, and comment attributes are assigned to each node. Clips with a Scratch primary grade get a ColorCorrector node after the Loader with the lift, gamma, gain, and saturation of the grade.
 
 # Script Installation:
 
@@ -71,6 +71,8 @@ If you click on the "Fusion Studio" custom command button and see the command pr
 
 If you click on the "Fusion Studio" custom command button and see the command prompt based error message "the following arguments are required: xml_path" it means you need to go back and adjust the custom command parameters. Change the "XML Export:" setting to "Selection".
 
+The fusionscript library is looked up in the Fusion Studio 19 and 18 install folders. If Fusion is installed somewhere else, set the FUSION_SCRIPT_LIB environment variable to the full path of the fusionscript library (fusionscript.so or fusionscript.dll).
+
 # Script CLI Usage Example:
 
 It is possible to run the included "Scratch2Fusion.py" python script from the command-line.
@@ -79,6 +81,86 @@ It is possible to run the included "Scratch2Fusion.py" python script from the co
 
 python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-0.xml"
 
+# Script CLI Options:
+
+By default every Loader node is created with a single batched paste into the comp, so the import time stays flat as the clip count grows. The nodes are laid out like the Construct: each layer is a row of Loader nodes in slot order, and the Loader nodes that are stacked in the same slot are combined with a chain of Merge nodes below them, with the lowest layer as the background.
+
+Several XML files, or glob patterns that match them, can be imported in one run. The files are parsed in parallel and imported over a single Fusion connection. The Loader nodes of each file are placed in their own underlay in the foreground comp, named after the Scratch group and construct, and a summary is printed at the end.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-*.xml"
+
+--per-clip
+	Add each Loader node with individual scripting calls (the original import behaviour). The nodes are placed in the same layout as the batched import, but no Merge nodes are added.
+
+--output-comp <path.comp>
+	Write the Loader nodes into a new Fusion .comp file instead of the foreground comp. When several XML files are given they are all written to this file, each in its own underlay. This mode does not connect to Fusion, so it also works on systems where Fusion is not installed.
+
+--new-comp
+	When several XML files are given, import each one into a new comp instead of an underlay in the foreground comp.
+
+--plan <plan.json>
+	Compile the import of the XML file into a plan without connecting to Fusion. The plan is a JSON file that lists every Loader, ColorCorrector, and Merge node that the import creates, with its settings, tile color, and position, so it can be reviewed before it is applied, or applied on another machine.
+
+--apply [<plan.json>]
+	Apply a plan saved with --plan, or the plan of the XML file when no plan file is given. The Loader nodes that are already in the foreground comp are read once and compared with the plan, and only the missing nodes are pasted and the changed ones updated. The plans of XML files are cached by the contents of the file, so applying the same cmd-0.xml again skips the XML parsing. Give the XML file before --apply, or use --apply= to apply the plan of the XML file.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-0.xml" --plan "/tmp/cmd-0.plan.json"
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" --apply "/tmp/cmd-0.plan.json"
+
+--hosts <host> [<host> ...]
+	Spread the import over several Fusion Studio workstations or render nodes. The shots are split by the --split-by key, each part is pasted into a new comp, and the parts are shared out over the hosts so they are imported at the same time, with a thread and a connection per host. Each Fusion has to allow network scripting in its preferences. The PathMaps of each Fusion are resolved by that Fusion when the media is loaded.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" --hosts fx01 fx02 fx03 --split-by reel "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-0.xml"
+
+--split-by <reel|group|layer>
+	How the shots are split into comps for --hosts: one comp per reel (the default), per Scratch group and construct, or per layer.
+
+--pipeline [<chunk size>]
+	Overlap the XML parsing with the Fusion work on large selections. A parser thread reads and prepares the shots while the previous chunk of shots is pasted into the comp, and only a few chunks are held in memory at once. Each chunk is laid out as its own block of nodes, and image sequences are only collapsed within a chunk. The chunk size defaults to 200 shots.
+
+--sync
+	Incremental re-import. Each Loader node is tagged with the uuid of its Scratch shot. Shots that are already in the comp are left alone, shots that changed have their filename, in/out range, note, tile color, and grade updated, and only the new shots are added.
+
+--no-collapse
+	Shots that use touching or overlapping frame ranges of the same numbered image sequence (DPX, EXR, etc.) are normally merged into a single Loader node that covers the whole range. This option adds a Loader node for every shot instead.
+
+--preflight
+	Check the media before anything is sent to Fusion. The files (or the first and last frames of an image sequence) are checked in parallel, and the DPX, EXR, and QuickTime headers are compared with the resolution, frame rate, and handles in the XML. Clips with missing media are skipped and a report is printed.
+
+--path-map <SRC=DST>
+	Replace the SRC folder at the start of each media path with DST, for example when the Scratch project was set up on Windows and the media is mounted elsewhere on this system. Use "media_path" as SRC to remap the media folder of the Scratch project. Can be used more than once. The remaps are applied on top of the PathMaps from the Fusion preferences and the foreground comp, which are read once when the script connects, so no Fusion scripting call is made per clip.
+
+	--path-map "X:/Media=/mnt/media" --path-map "media_path=/mnt/project"
+
+--palette <palette.json>
+	Override the Loader tile colors used for the Scratch note status values. Each entry is named by the status number or color name ("0" to "9", "yellow", "red", ...), or "none" for shots without a note, and holds a "fusion" color as [R, G, B] values from 0 to 1. See ScratchPalette.py for an example.
+
+--no-grade
+	Do not add the ColorCorrector nodes that carry the Scratch primary grade of each clip.
+
+--cache-size <MB>
+	The parsed shots of every XML file are cached in a compact binary file in the "ScratchCache" folder of the Scratch temp_path, keyed by the contents of the file, so importing the same cmd-0.xml again skips the XML parsing. The least recently used files are removed when the cache grows past this size (256 MB by default, or the SCRATCH_CACHE_MB environment variable). Use 0 to turn the cache off.
+
+--profile <results.json>
+	Time each stage of the import (connecting to Fusion, reading the XML, parsing the shots, and the Fusion work) and count every scripting call. A summary table is printed at the end and the results are saved to the JSON file.
+
+-v, --verbose
+	Show the details of every clip. By default the per-clip details are not printed, and the progress messages are sent to the Fusion Console as a single block at the end of the import.
+
+-q, --quiet
+	Only show warnings and errors.
+
+--log-file <path.log>
+	Also write a detailed log, with the details of every clip, to a log file. The file is rotated when it reaches 5 MB.
+
+--watch
+	Keep running as a watch folder daemon. Every new "cmd-*.xml" file that Scratch writes to the watch folder is imported using the Fusion connection that is already open. While the daemon is running, the "Fusion Studio" custom command leaves the XML file to the daemon instead of importing it a second time. The folder named by the "watch_folder" attribute of an imported XML file is watched as well.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Fusion.py" --watch --watch-folder "/Library/Application Support/Assimilator/Project/LiveLink/Temp/"
+
+--watch-folder <folder>
+	A folder to monitor in --watch mode. Defaults to the folder that holds the xml_path argument. Can be used more than once.
+
 # Script Copyright:
 
 The "Scratch2Fusion.py" script is based upon Assimilate's "s2nuke_v9.py" script:
@@ -97,205 +179,677 @@ The original "s2nuke_v9.py" script was provided with the following license terms
 * CONTRIBUTORS ACCEPT NO RESPONSIBILITY IN ANY CONCEIVABLE MANNER.
 '''
 
-import xml.etree.ElementTree as ET
-import sys, os, argparse, json, re, glob, platform
+import os, argparse, re, bisect
+
+import ScratchSession, ScratchXML, ScratchSequence, ScratchProfile, ScratchLog, ScratchWatch, ScratchPathMap, ScratchPalette, ScratchPipeline, ScratchPlan, ScratchCache, ScratchGrade, ScratchImport
+
+log = ScratchLog.log
+
+# Media path mapping, filled in by Main() from the --path-map options and by Connect() from the Fusion PathMap preferences
+paths = ScratchPathMap.PathMap()
+
+# Note colors, built once per run. Main() adds the --palette overrides.
+palette = ScratchPalette.Palette()
 
-import warnings
-warnings.filterwarnings('ignore', category=DeprecationWarning)
+# Add a ColorCorrector node for the Scratch primary grade of each clip. Main() turns this off for --no-grade.
+grades = True
 
-# The imp library will be depreciated in Python 3.12. Look for a replacement option at that time.
-import imp
+# Shared fusionscript connection for the whole run
+session = ScratchSession.Session('Fusion')
 
 def FuScriptLib():
-	lib_path = ''
-	if sys.platform.startswith('darwin'):
-		lib_path = '/Applications/Blackmagic Fusion 18/Fusion.app/Contents/Libraries/fusionscript.so'
-	elif sys.platform.startswith('win'):
-		lib_path = 'C:\\Program Files\\Blackmagic Design\\Fusion 18\\fusionscript.dll'
-	elif sys.platform.startswith('linux'):
-		lib_path = '/opt/BlackmagicDesign/Fusion18/fusionscript.so'
-
-	if not os.path.isfile(lib_path):
-		print('[Fusion Studio] [Library Does Not Exist on Disk]', lib_path)
-
-	bmd = imp.load_dynamic('fusionscript', lib_path)
-	if bmd:
-		sys.modules[__name__] = bmd
-	else:
-		raise ImportError('[Fusion Studio] Could not locate module dependencies')
-	return bmd
+	return session.Lib()
 
 def Resolve():
-	app = FuScriptLib().scriptapp('Resolve')
+	app = session.App('Resolve')
 	return app
 
 def Fusion():
-	app = FuScriptLib().scriptapp('Fusion', 'localhost')
+	app = session.App('Fusion', 'localhost')
 	return app
 
-# Get the Fusion objects
-fu = Fusion()
-fusion = Fusion()
-bmd = FuScriptLib()
-
-# Connect to the current foreground comp
-print(fusion)
-comp = fu.GetCurrentComp()
-
-def AddNode(clip_dict):
-	print(clip_dict)
-	# Deselect the nodes
-	comp.CurrentFrame.FlowView.Select()
-	# Add a Loader node
-	ldr = comp.AddTool('Loader', -32768, -32768)
+# The Fusion objects are filled in by Connect(). They stay empty when a .comp file is written offline.
+fu = None
+fusion = None
+bmd = None
+comp = None
+
+def Connect():
+	global fu, fusion, bmd, comp
+
+	with ScratchProfile.Stage('Connect'):
+		# Get the Fusion objects
+		fu = Fusion()
+		fusion = fu
+		bmd = FuScriptLib()
+
+		# Connect to the current foreground comp
+		log.debug(str(fusion))
+		comp = session.Comp()
+
+		# Read the PathMap tables once so the clip paths can be mapped without a comp.MapPath() call per clip
+		if comp:
+			paths.SetHostMaps(fu.GetPrefs('Global.Paths.Map'), comp.GetPrefs('Comp.Paths.Map'))
+	return comp
+
+def FlushConsole():
+	# Send the buffered log messages to the Fusion console with a single call
+	if comp:
+		ScratchLog.Flush(comp.Print)
+	else:
+		ScratchLog.Flush()
+
+def AddNode(shot, x=-32768, y=-32768):
+	log.debug('[Clip] ' + str(shot))
+	# Add a Loader node at its place in the node layout
+	ldr = comp.AddTool('Loader', x, y)
 	# Set the Loader node filename
-	filename = comp.MapPath(clip_dict['file'])
+	filename = ScratchSequence.FirstFrame(shot)
 	ldr.Clip[fu.TIME_UNDEFINED] = filename
-	comp.Print(filename + '\n')
 	# Set the global frame ranges
-	ldr.SetAttrs({'GlobalStart' : clip_dict['in']})
-	ldr.SetAttrs({'GlobalEnd' : clip_dict['out']})
+	ldr.SetAttrs({'GlobalStart' : shot.frame_in})
+	ldr.SetAttrs({'GlobalEnd' : shot.frame_out})
 	# Set the node tile color
-	# The default color for Loader nodes is blue in Fusion (note_color = 0)
-	color = {'R': 0.474509803921569, 'G': 0.658823529411765, 'B': 0.815686274509804}
-	if clip_dict['note_color'] == None:
-		# blue
-		color = {'R': 0.474509803921569, 'G': 0.658823529411765, 'B': 0.815686274509804}
-	elif clip_dict['note_color'] == '0':
-		# yellow
-		color = {'R': 0.886274509803922, 'G': 0.662745098039216, 'B': 0.109803921568627}
-	elif clip_dict['note_color'] == '1':
-		# red
-		color = {'R': 0.913725490196078, 'G': 0.549019607843137, 'B': 0.709803921568627}
-	elif clip_dict['note_color'] == '2':
-		# green
-		color = {'R': 0.266666666666667, 'G': 0.56078431372549, 'B': 0.396078431372549}
-	elif clip_dict['note_color'] == '3':
-		# blue
-		color = {'R': 0.474509803921569, 'G': 0.658823529411765, 'B': 0.815686274509804}
-	elif clip_dict['note_color'] == '4':
-		# purple
-		color = {'R': 0.6, 'G': 0.450980392156863, 'B': 0.627450980392157}
-	elif clip_dict['note_color'] == '5':
-		# orange
-		color = {'R': 0.92156862745098, 'G': 0.431372549019608, 'B': 0}
-	elif clip_dict['note_color'] == '6':
-		# cyan
-		color = {'R': 0, 'G': 0.596078431372549, 'B': 0.6}
-	elif clip_dict['note_color'] == '7':
-		# pink
-		color = {'R': 0.913725490196078, 'G': 0.549019607843137, 'B': 0.709803921568627}
-	elif clip_dict['note_color'] == '8':
-		# black
-		color = {'R': 0.549019607843137, 'G': 0.352941176470588, 'B': 0.247058823529412}
-	elif clip_dict['note_color'] == '9':
-		# white
-		color = {'R': 0.725490196078431, 'G': 0.690196078431373, 'B': 0.592156862745098}
-
-	ldr.TileColor = color
+	ldr.TileColor = palette.TileColor(shot.note_color)
 
 	# Set the comment to hold the Scratch note
-	ldr.Comments = clip_dict['note']
-
-def ParseClip(clip, clip_NB, clips_dict):
-	clip_dict = {}
-	clip_dict['uuid'] = clip.attrib['uuid']
-	clip_dict['slot']='0'
-	if 'type' in clip.attrib:
-		clip_dict['type'] = clip.attrib['type']
-	if 'slot' in clip.attrib:
-		clip_dict['slot'] = clip.attrib['slot']
-	if 'slot_len' in clip.attrib:
-		clip_dict['slot_len'] = clip.attrib['slot_len']
-	if 'layer' in clip.attrib:
-		clip_dict['layer'] = clip.attrib['layer']
-	if 'frame_no' in clip.attrib:
-		clip_dict['frame_no'] = clip.attrib['frame_no']  # Only on the First clip of selection
-	if 'frame_file' in clip.attrib:
-		# Only on the First clip of selection
-		clip_dict['frame_file'] = clip.attrib['frame_file']
-
-	clip_dict['file'] = clip.find('file').text
-	clip_dict['format'] = clip_dict['file'][-3:]
-	clip_dict['name'] = clip.find('name').text
-
-	# Remove any version numbers scratch might have added to the name
-	idx = clip_dict['name'].find('[')
-	if idx > 0:
-		clip_dict['name'] = clip_dict['name'][0:idx]
-	clip_dict['reel_id'] = ' '
-
-	if clip.find('reel_id') is not None:
-		clip_dict['reel_id'] = clip.find('reel_id').text
-
-	clip_handles = clip.find('handles')
-	clip_dict['in'] = clip_handles.find('in').text
-	clip_dict['out'] = clip_handles.find('out').text
-	clip_dict['length'] = clip.find('length').text
-
-	clip_size = clip.find('size')
-	clip_dict['width'] = clip_size.find('width').text
-	clip_dict['height'] = clip_size.find('height').text
-	clip_dict['aspect'] = '1'
-	if clip.find('aspect') is not None:
-		clip_dict['aspect'] = clip.find('aspect').text
-	clip_dict['fps'] = clip.find('fps').text
-	clip_dict['timecode'] = clip.find('timecode').text
-	ColorGrade = clip.find('colorgrade')
-	Input = ColorGrade.find('input')
-
-	clip_dict['note'] = ''
-	clip_dict['note_color'] = clip.find('note_color')
-
-	if clip.find('notes') is not None:
-		notes = clip.find('notes')
-		note = notes.find('note')
-		clip_dict['note_color'] = note.attrib['status']
-		clip_dict['note'] = note.text
-
-	# Import the footage
-	AddNode(clip_dict)
-
-def XML_Selection(xml):
-	clip_NB = 1
-	xml_infos = {}
-	project={}
-
-	tree = ET.parse(xml)
-	root = tree.getroot()
-
-	project['datetime'] = root.attrib['datetime']
-	project['version'] = root.attrib['version']
-	project['name'] =  root.attrib['project']
-	project['project_path'] =  root.attrib['project_path']
-	project['media_path'] =  root.attrib['media_path']
-	project['temp_path'] = root.attrib['temp_path']
-	project['watch_folder'] =  root.attrib['watch_folder'].replace('\\', '/')
-	xml_infos['project'] = project
-
-	output = root.find('output')
-	outputRes = output.find('resolution')
-	outputWidth=outputRes.find('w').text
-	outputHeight=outputRes.find('h').text
-
-	xml_infos['output_res'] = [outputWidth,outputHeight]
-	xml_infos['output_fps'] = output.find('fps').text
-
-	Selection = root.find('selection')
-	group = Selection.attrib['group']
-	xml_infos['group_name'] =  group
-	construct = Selection.attrib['construct']
-	xml_infos['construct_name'] = construct
-	clips = Selection.findall('shot')
-
-	comp.Print('[Importing Media]\n')
-	clips_dict = {}
-	for clip in clips:
-		ParseClip(clip, clip_NB, clips_dict)
-
-	return xml_infos
+	ldr.Comments = shot.note
+
+	# Tag the node with the Scratch shot for later --sync runs
+	ldr.SetData('Scratch', ScratchData(shot))
+
+	if shot.grade:
+		# Add the ColorCorrector node half a row below the Loader node
+		corrector = comp.AddTool('ColorCorrector', x, y + 1 if y != -32768 else y)
+		corrector.ConnectInput('Input', ldr)
+		SetGrade(corrector, shot)
+		corrector.SetData('ScratchGrade', {'uuid': shot.uuid})
+
+def ScratchData(shot):
+	# Custom data stored on each Loader node to identify its Scratch shot
+	return {'uuid': shot.uuid, 'hash': ScratchXML.ShotHash(shot)}
+
+# Loader nodes are laid out like the Construct, with one column per slot and one row per layer
+LOADER_SPACING_X = 110
+LOADER_SPACING_Y = 66
+
+# The size of one comp.AddTool() grid unit in the Pos values of a settings table
+FLOW_UNIT_X = 110
+FLOW_UNIT_Y = 33
+
+# Empty grid rows left between the nodes of two XML documents
+BLOCK_SPACING = 2
+
+def Layout(shots):
+	# Split the shots into the columns of the node layout. A column starts with a shot on the lowest layer and
+	# holds the shots of the upper layers that start over it, bottom layer first. Returns (columns, layer rows).
+	layers = {layer: row for row, layer in enumerate(sorted(set(shot.layer for shot in shots)))}
+	starts = []
+	columns = []
+	for shot in sorted(shots, key=lambda shot: (shot.layer, shot.slot)):
+		index = bisect.bisect_right(starts, shot.slot) - 1
+		column = columns[index] if index >= 0 else None
+		if column is None or column[-1].layer == shot.layer or shot.slot >= column[0].slot + ScratchXML.SlotLength(column[0]):
+			index += 1
+			column = []
+			starts.insert(index, shot.slot)
+			columns.insert(index, column)
+		column.append(shot)
+	return columns, layers
+
+def Position(column, row):
+	# The Pos of a node in a settings table
+	return [column * LOADER_SPACING_X, row * LOADER_SPACING_Y]
+
+def LoaderSettings(shot, pos):
+	# Build the settings table for a single Loader node. The table uses the
+	# same layout Fusion returns from comp.CopySettings() so it can be pasted as-is.
+	start = shot.frame_in
+	end = shot.frame_out
+
+	return {
+		'__ctor': 'Loader',
+		'Clips': [
+			{
+				'__ctor': 'Clip',
+				'ID': 'Clip1',
+				'Filename': ScratchSequence.FirstFrame(shot),
+				'GlobalStart': start,
+				'GlobalEnd': end,
+				'TrimIn': 0,
+				'TrimOut': end - start,
+			},
+		],
+		'Inputs': {
+			'GlobalIn': {'__ctor': 'Input', 'Value': start},
+			'GlobalOut': {'__ctor': 'Input', 'Value': end},
+			'Comments': {'__ctor': 'Input', 'Value': shot.note or ''},
+		},
+		'ViewInfo': {'__ctor': 'OperatorInfo', 'Pos': pos},
+		'Colors': {'TileColor': palette.TileColor(shot.note_color)},
+		'CustomData': {'Scratch': ScratchData(shot)},
+	}
+
+def ColorCorrectorSettings(shot, source, pos):
+	# A ColorCorrector node with the Scratch primary grade of a shot, fed by its Loader node
+	inputs = dict((name, {'__ctor': 'Input', 'Value': value}) for name, value in ScratchGrade.FusionInputs(shot.grade).items())
+	inputs['Input'] = {'__ctor': 'Input', 'SourceOp': source, 'Source': 'Output'}
+	return {
+		'__ctor': 'ColorCorrector',
+		'Inputs': inputs,
+		'ViewInfo': {'__ctor': 'OperatorInfo', 'Pos': pos},
+		'CustomData': {'ScratchGrade': {'uuid': shot.uuid}},
+	}
+
+def MergeSettings(background, foreground, pos):
+	# A Merge node that layers the output of one pasted tool over another
+	return {
+		'__ctor': 'Merge',
+		'Inputs': {
+			'Background': {'__ctor': 'Input', 'SourceOp': background, 'Source': 'Output'},
+			'Foreground': {'__ctor': 'Input', 'SourceOp': foreground, 'Source': 'Output'},
+		},
+		'ViewInfo': {'__ctor': 'OperatorInfo', 'Pos': pos},
+	}
+
+def GroupName(project):
+	# The Scratch group and construct of an XML document, used to name its underlay
+	return ' '.join(name for name in (project.group_name, project.construct_name) if name) or project.name or 'Scratch'
+
+def UnderlaySettings(name, first_row, rows, columns):
+	# An underlay behind the nodes of one XML document. Pos is the top left corner.
+	return {
+		'__ctor': 'Underlay',
+		'Inputs': {
+			'Comments': {'__ctor': 'Input', 'Value': name},
+		},
+		'ViewInfo': {
+			'__ctor': 'UnderlayInfo',
+			'Pos': [-LOADER_SPACING_X // 2, (first_row - 1) * LOADER_SPACING_Y],
+			'Size': [columns * LOADER_SPACING_X, (rows + 1) * LOADER_SPACING_Y],
+		},
+	}
+
+def ToolName(tools, name):
+	# A unique tool name made from a Scratch group or construct name
+	base = re.sub(r'\W+', '_', name).strip('_') or 'Scratch'
+	if not base[0].isalpha():
+		base = 'Scratch_' + base
+	tool_name = base
+	index = 1
+	while tool_name in tools:
+		index += 1
+		tool_name = base + '_' + str(index)
+	return tool_name
+
+def LoaderTools(tools, shots, first_row=0, name=None, merges=True):
+	# Add the nodes of one XML document to a settings table, starting on first_row, with an optional underlay
+	# around them. Graded shots get a ColorCorrector node half a row below their Loader node. The Loader (or
+	# ColorCorrector) nodes of each column are stacked with Merge nodes in the Construct layer order, below the
+	# Loader rows. Returns the first free row after the block.
+	counts = {'Loader': 0, 'ColorCorrector': 0, 'Merge': 0}
+	for settings in tools.values():
+		if settings['__ctor'] in counts:
+			counts[settings['__ctor']] += 1
+
+	columns, layers = Layout(shots)
+	merge_row = first_row + len(layers)
+	rows = len(layers)
+	for column_NB, column in enumerate(columns):
+		output = None
+		for stack_NB, shot in enumerate(column):
+			counts['Loader'] += 1
+			loader = 'Loader' + str(counts['Loader'])
+			x, y = Position(column_NB, first_row + layers[shot.layer])
+			tools[loader] = LoaderSettings(shot, [x, y])
+			if shot.grade:
+				counts['ColorCorrector'] += 1
+				corrector = 'ColorCorrector' + str(counts['ColorCorrector'])
+				tools[corrector] = ColorCorrectorSettings(shot, loader, [x, y + LOADER_SPACING_Y // 2])
+				loader = corrector
+			if output is None or not merges:
+				output = loader
+				continue
+			counts['Merge'] += 1
+			merge = 'Merge' + str(counts['Merge'])
+			tools[merge] = MergeSettings(output, loader, Position(column_NB, merge_row + stack_NB - 1))
+			output = merge
+			rows = max(rows, len(layers) + stack_NB)
+
+	if name and shots:
+		tools[ToolName(tools, name)] = UnderlaySettings(name, first_row, rows, len(columns))
+		return first_row + rows + BLOCK_SPACING
+	return first_row + rows
+
+def AddNodes(shots, name=None, first_row=0, merges=True):
+	# Create every Loader and Merge node with a single comp.Paste() call
+	tools = {}
+	next_row = LoaderTools(tools, shots, first_row, name, merges)
+
+	if tools:
+		comp.Paste({'Tools': tools})
+	log.info('[Loaders Added] ' + str(len(shots)))
+	return next_row
+
+def AddNodesPerClip(shots, first_row=0):
+	# Add each Loader node with its own scripting calls, at the place it gets in the batched layout
+	columns, layers = Layout(shots)
+	for column_NB, column in enumerate(columns):
+		for shot in column:
+			x, y = Position(column_NB, first_row + layers[shot.layer])
+			AddNode(shot, x // FLOW_UNIT_X, y // FLOW_UNIT_Y)
+	return first_row + len(layers)
+
+def LoaderIndex():
+	# Map the Scratch shot uuid to each Loader node already in the comp
+	index = {}
+	for tool in (comp.GetToolList(False, 'Loader') or {}).values():
+		data = tool.GetData('Scratch')
+		if data and data.get('uuid'):
+			index[data['uuid']] = (tool, data.get('hash'))
+	return index
+
+def GradeIndex():
+	# Map the Scratch shot uuid to each ColorCorrector node that holds the grade of a shot
+	index = {}
+	for tool in (comp.GetToolList(False, 'ColorCorrector') or {}).values():
+		data = tool.GetData('ScratchGrade')
+		if data and data.get('uuid'):
+			index[data['uuid']] = tool
+	return index
+
+def SetGrade(corrector, shot):
+	# Set the ColorCorrector inputs of a grade, or reset them when the shot is no longer graded
+	for name, value in ScratchGrade.FusionInputs(shot.grade or ScratchGrade.IDENTITY).items():
+		corrector.SetInput(name, value)
+
+def PatchNode(ldr, shot, corrector=None):
+	# Update a Loader node, and the ColorCorrector node of its grade, from a Scratch shot that changed since it was imported
+	ldr.Clip[fu.TIME_UNDEFINED] = ScratchSequence.FirstFrame(shot)
+	ldr.GlobalIn[fu.TIME_UNDEFINED] = shot.frame_in
+	ldr.GlobalOut[fu.TIME_UNDEFINED] = shot.frame_out
+	ldr.TileColor = palette.TileColor(shot.note_color)
+	ldr.Comments[fu.TIME_UNDEFINED] = shot.note or ''
+	ldr.SetData('Scratch', ScratchData(shot))
+	if corrector:
+		SetGrade(corrector, shot)
+	elif shot.grade:
+		log.debug('[Sync] ' + shot.name + ' has no ColorCorrector node for its grade')
+
+def SyncNodes(shots, indexes=None):
+	# Only add the new shots and update the changed ones. indexes keeps the LoaderIndex() and GradeIndex() of the comp
+	# between calls, so the comp is only indexed once when the shots are synced in chunks.
+	if indexes is None:
+		indexes = {}
+	if 'loaders' not in indexes:
+		indexes['loaders'] = LoaderIndex()
+	index = indexes['loaders']
+	added = []
+	changed = []
+	for shot in shots:
+		existing = index.get(shot.uuid)
+		if existing is None:
+			added.append(shot)
+		elif existing[1] != ScratchXML.ShotHash(shot):
+			changed.append(shot)
+
+	if changed:
+		if 'correctors' not in indexes:
+			indexes['correctors'] = GradeIndex()
+		correctors = indexes['correctors']
+		for shot in changed:
+			PatchNode(index[shot.uuid][0], shot, correctors.get(shot.uuid))
+
+	if added:
+		# The new Loader nodes are not wired into the Merge stacks that are already in the comp
+		AddNodes(added, merges=False)
+	log.info('[Sync] ' + str(len(added)) + ' added, ' + str(len(changed)) + ' updated, ' + str(len(shots) - len(added) - len(changed)) + ' unchanged')
+
+# Settings tables that Fusion writes with the ordered() constructor
+LUA_ORDERED_TABLES = ('Tools',)
+
+def LuaKey(key):
+	if isinstance(key, str) and key.isidentifier():
+		return key
+	return '[' + LuaValue(key) + ']'
+
+def LuaValue(value, indent=''):
+	# Serialize a settings table (as used by comp.Paste) to Fusion's Lua table syntax
+	if value is None:
+		return 'nil'
+	if isinstance(value, bool):
+		return 'true' if value else 'false'
+	if isinstance(value, (int, float)):
+		return repr(value)
+	if isinstance(value, str):
+		return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r') + '"'
+	if isinstance(value, (list, tuple)):
+		if not value:
+			return '{ }'
+		if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value):
+			return '{ ' + ', '.join(LuaValue(item) for item in value) + ' }'
+		inner = indent + '\t'
+		return '{\n' + ''.join(inner + LuaValue(item, inner) + ',\n' for item in value) + indent + '}'
+
+	ctor = value.get('__ctor')
+	inner = indent + '\t'
+	lines = []
+	for key, item in value.items():
+		if key == '__ctor':
+			continue
+		prefix = 'ordered() ' if key in LUA_ORDERED_TABLES else ''
+		lines.append(inner + LuaKey(key) + ' = ' + prefix + LuaValue(item, inner) + ',\n')
+	table = '{\n' + ''.join(lines) + indent + '}'
+	if ctor:
+		return ctor + ' ' + table
+	return table
+
+def WriteComp(comp_path, blocks):
+	# Write the Loader nodes to a Fusion .comp file without connecting to Fusion. Each block is
+	# (project, shots, underlay name) for one XML document, and the first project sets the frame format.
+	tools = {}
+	first_row = 0
+	shot_count = 0
+	for project, shots, name in blocks:
+		first_row = LoaderTools(tools, shots, first_row, name)
+		shot_count += len(shots)
+
+	all_shots = [shot for project, shots, name in blocks for shot in shots]
+	start = min([shot.frame_in for shot in all_shots] or [0])
+	end = max([shot.frame_out for shot in all_shots] or [0])
+	project = blocks[0][0] if blocks else ScratchXML.Project()
+
+	composition = {
+		'__ctor': 'Composition',
+		'CurrentTime': start,
+		'RenderRange': [start, end],
+		'GlobalRange': [start, end],
+		'CurrentID': len(tools),
+		'HiQ': True,
+		'PlaybackUpdateMode': 0,
+		'SavedOutputs': 0,
+		'HeldTools': 0,
+		'DisabledTools': 0,
+		'LockedTools': 0,
+		'AudioOffset': 0,
+		'Resumable': True,
+		'OutputClips': [],
+		'Tools': tools,
+		'Prefs': {
+			'Comp': {
+				'FrameFormat': {
+					'Width': project.width or 1920,
+					'Height': project.height or 1080,
+					'Rate': project.fps or 24.0,
+				},
+			},
+		},
+	}
+
+	with open(comp_path, 'w', encoding='utf-8') as comp_file:
+		comp_file.write(LuaValue(composition) + '\n')
+	log.info('[Comp Written] ' + comp_path + ' (' + str(shot_count) + ' Loaders)')
+
+def PrepareShots(project, shots, collapse=True, preflight=False):
+	# Each Loader node gets the grade of its shots, so only the shots with the same grade share a Loader node
+	return ScratchImport.PrepareShots(project, shots, paths, collapse, preflight, grades, by_grade=True)
+
+def SendShots(shots, batch=True, sync=False, name=None, first_row=0, indexes=None):
+	# Add the shots to the current comp. Returns the first free Loader grid row.
+	if sync:
+		# Import the new and changed footage
+		with ScratchProfile.Stage('Sync Loaders'):
+			SyncNodes(shots, indexes)
+	elif batch:
+		# Import the footage
+		with ScratchProfile.Stage('Add Loaders'):
+			return AddNodes(shots, name, first_row)
+	else:
+		with ScratchProfile.Stage('Add Loaders'):
+			return AddNodesPerClip(shots, first_row)
+	return first_row
+
+def XML_Selection(xml, batch=True, comp_path=None, sync=False, collapse=True, preflight=False, pipeline=None):
+	if pipeline and not comp_path:
+		return XML_Pipeline(xml, batch, sync, collapse, preflight, pipeline)
+	project = ScratchXML.Project()
+
+	log.info('[Importing Media]')
+	# Shots are parsed as they are streamed from the XML document
+	shots = ScratchCache.ReadShots(xml, project)
+	shots = PrepareShots(project, shots, collapse, preflight)
+
+	if comp_path:
+		# Save the footage to a comp file
+		with ScratchProfile.Stage('Write Comp'):
+			WriteComp(comp_path, [(project, shots, None)])
+	else:
+		SendShots(shots, batch, sync)
+
+	FlushConsole()
+	return project
+
+def XML_Pipeline(xml, batch=True, sync=False, collapse=True, preflight=False, chunk_size=ScratchPipeline.CHUNK_SIZE):
+	# Parse and prepare the shots on a parser thread while the previous chunk is sent to Fusion. Each chunk is
+	# laid out as its own block of rows, and image sequences are only collapsed within a chunk.
+	project = ScratchXML.Project()
+	first_row = 0
+	count = 0
+	# The nodes already in the comp are indexed once, not for every chunk. The uuids of the shots are unique, so the
+	# nodes added by one chunk are never looked up by the next.
+	indexes = {}
+
+	log.info('[Importing Media]')
+	chunks = ScratchPipeline.ShotChunks(xml, project, lambda shots: PrepareShots(project, shots, collapse, preflight), chunk_size)
+	for parsed, shots in ScratchPipeline.Pipeline(chunks):
+		first_row = SendShots(shots, batch, sync, first_row=first_row, indexes=indexes)
+		count += len(shots)
+	log.info('[Pipeline] ' + str(count) + ' shots sent in chunks of ' + str(chunk_size))
+
+	FlushConsole()
+	return project
+
+def XML_Files(xmls, batch=True, comp_path=None, new_comp=False, sync=False, collapse=True, preflight=False):
+	# Import several XML documents over the open Fusion connection. The documents are parsed in parallel first, then each one
+	# gets an underlay in the foreground comp, a new comp of its own (new_comp), or an underlay in the .comp file (comp_path).
+	global comp
+	foreground = comp
+	results = []
+	blocks = []
+	first_row = 0
+
+	log.info('[Importing Media]')
+	with ScratchProfile.Stage('Parse XML Files'):
+		parsed = list(ScratchXML.ParseXMLs(xmls, parse=ScratchCache.ParseXML))
+
+	try:
+		for xml, project, shots, error in parsed:
+			if error is not None:
+				results.append((xml, None, 0, error))
+				continue
+			log.info('[XML Document] ' + xml)
+			shots = PrepareShots(project, shots, collapse, preflight)
+			name = GroupName(project)
+
+			if comp_path:
+				blocks.append((project, shots, name))
+			elif new_comp:
+				comp = fu.NewComp()
+				comp.Lock()
+				try:
+					SendShots(shots, batch, sync)
+				finally:
+					comp.Unlock()
+			else:
+				first_row = SendShots(shots, batch, sync, name, first_row)
+			results.append((xml, name, len(shots), None))
+	finally:
+		# The later imports and the undo block of ImportXML() use the foreground comp, even when an import failed
+		comp = foreground
+
+	if comp_path:
+		with ScratchProfile.Stage('Write Comp'):
+			WriteComp(comp_path, blocks)
+
+	ScratchLog.Summary(results, 'Comp' if new_comp else 'Underlay')
+	FlushConsole()
+	return results
+
+def CompilePlan(xml, collapse=True, preflight=False):
+	# Phase one of a --plan or --apply import: the Loader and Merge nodes of the XML document, without connecting to Fusion
+	project = ScratchXML.Project()
+	shots = ScratchCache.ReadShots(xml, project)
+	shots = PrepareShots(project, shots, collapse, preflight)
+	shots_by_uuid = dict((shot.uuid, shot) for shot in shots)
+
+	plan = ScratchPlan.Plan('Fusion', xml, project)
+	tools = {}
+	with ScratchProfile.Stage('Compile Plan'):
+		LoaderTools(tools, shots)
+		for name, settings in tools.items():
+			if settings['__ctor'] == 'Loader':
+				data = settings['CustomData']['Scratch']
+				shot = shots_by_uuid[data['uuid']]
+				plan.Add('loader', name=name, uuid=data['uuid'], hash=data['hash'], shot=ScratchPlan.ShotRecord(shot), settings=settings)
+			elif settings['__ctor'] == 'ColorCorrector':
+				plan.Add('grade', name=name, uuid=settings['CustomData']['ScratchGrade']['uuid'], settings=settings)
+			else:
+				plan.Add(settings['__ctor'].lower(), name=name, settings=settings)
+	return plan
+
+def PlanXML(xml, options, collapse=True, preflight=False):
+	# The plan of an XML document, reused from the plan cache when the file and options have not changed. Preflight
+	# plans depend on the media on disk, so they are always compiled again.
+	return ScratchPlan.Compile('Fusion', xml, options, lambda: CompilePlan(xml, collapse, preflight), cache=not preflight)
+
+def ApplyPlan(plan):
+	# Phase two: compare the plan with the Loader nodes in the comp and only run the operations that are still needed
+	index = LoaderIndex()
+	loaders = plan.Operations('loader')
+	created = [op for op in loaders if op['uuid'] not in index]
+	changed = [op for op in loaders if op['uuid'] in index and index[op['uuid']][1] != op['hash']]
+
+	if len(created) == len(loaders):
+		# None of the shots are in the comp yet, so the Merge stacks are pasted as well
+		tools = dict((op['name'], op['settings']) for op in plan.operations if 'settings' in op)
+	else:
+		created_uuids = set(op['uuid'] for op in created)
+		tools = dict((op['name'], op['settings']) for op in created + plan.Operations('grade') if op['uuid'] in created_uuids)
+	if tools:
+		with ScratchProfile.Stage('Add Loaders'):
+			comp.Paste({'Tools': tools})
+
+	with ScratchProfile.Stage('Update Loaders'):
+		correctors = GradeIndex() if changed else {}
+		for op in changed:
+			# Use the tile color of the plan rather than the local palette
+			shot = ScratchPlan.RecordShot(op['shot'])
+			palette.Set(shot.note_color, op['settings']['Colors']['TileColor'])
+			PatchNode(index[op['uuid']][0], shot, correctors.get(op['uuid']))
+
+	log.info('[Apply] ' + str(len(created)) + ' added, ' + str(len(changed)) + ' updated, ' + str(len(loaders) - len(created) - len(changed)) + ' unchanged')
+	FlushConsole()
+	return plan.project
+
+# The shot groupings that --split-by can use to spread an import over the --hosts
+SPLIT_KEYS = ('reel', 'group', 'layer')
+
+def SplitKey(shot, project, split_by):
+	if split_by == 'reel':
+		return 'Reel ' + (shot.reel_id or 'None')
+	if split_by == 'layer':
+		return 'Layer ' + str(shot.layer)
+	return GroupName(project)
+
+def Partitions(blocks, split_by):
+	# Split the shots of every XML document into named partitions, in the order they first appear
+	partitions = {}
+	for project, shots in blocks:
+		for shot in shots:
+			partitions.setdefault(SplitKey(shot, project, split_by), []).append(shot)
+	return list(partitions.items())
+
+def HostImport(host_session, partition):
+	# Runs on the thread of one host: paste a partition into a new comp of its own on that Fusion
+	name, shots = partition
+	app = host_session.App()
+	if not app:
+		raise ConnectionError('Could not connect to Fusion')
+	host_comp = app.NewComp()
+	if not host_comp:
+		raise ConnectionError('Could not create a new comp')
+
+	tools = {}
+	LoaderTools(tools, shots, 0, name)
+	host_comp.Lock()
+	host_comp.Paste({'Tools': tools})
+	host_comp.Unlock()
+	log.info('[' + host_session.address + '] [Loaders Added] ' + name + ' (' + str(len(shots)) + ')')
+	return len(shots)
+
+def XML_Hosts(xmls, hosts, split_by='reel', collapse=True, preflight=False):
+	# Import the XML documents into several Fusion instances at once. The shots are split by reel, group, or layer, each
+	# partition is pasted into a new comp, and the partitions are spread over the hosts with a thread per host.
+	blocks = []
+	results = []
+
+	log.info('[Importing Media]')
+	with ScratchProfile.Stage('Parse XML Files'):
+		parsed = list(ScratchXML.ParseXMLs(xmls, parse=ScratchCache.ParseXML))
+	for xml, project, shots, error in parsed:
+		if error is not None:
+			log.error('[XML Document] ' + xml + ' [Error] ' + str(error))
+			continue
+		log.info('[XML Document] ' + xml)
+		blocks.append((project, PrepareShots(project, shots, collapse, preflight)))
+
+	pool = ScratchSession.Pool(hosts)
+	with ScratchProfile.Stage('Import on Hosts'):
+		for host_session, (name, shots), count, error in pool.Run(HostImport, Partitions(blocks, split_by), lambda partition: len(partition[1])):
+			results.append((name, host_session.address, count or 0, error))
+
+	ScratchLog.Summary(results, 'Host', 'partitions')
+	FlushConsole()
+	return results
+
+# Lock file that the --watch daemon keeps in each watched folder
+WATCH_LOCK = 'Scratch2Fusion.watch'
+
+def ImportXML(xml, **options):
+	# Add a new undo history item
+	comp.StartUndo('Scratch to Fusion')
+
+	# Stop file dialogs from appearing
+	comp.Lock()
+
+	try:
+		# Process the XML file, each file of a list, or a compiled plan
+		if isinstance(xml, ScratchPlan.Plan):
+			mClipData = ApplyPlan(xml)
+		elif isinstance(xml, list):
+			mClipData = XML_Files(xml, **options)
+		else:
+			log.info('[XML Document] ' + xml)
+			mClipData = XML_Selection(xml, **options)
+	finally:
+		# Allow file dialogs to appear, even when the import failed
+		comp.Unlock()
+
+		#Close off the undo history item block
+		comp.EndUndo(True)
+	return mClipData
+
+def Reconnect():
+	# Pick up the current foreground comp, reusing the open Fusion connection
+	session.Reset()
+	return Connect()
+
+def Watch(xmls, folders, **options):
+	ScratchImport.Watch(xmls, folders, WATCH_LOCK, Reconnect, lambda xml: ImportXML(xml, **options), 'Scratch 2 Fusion', 'Could not connect to the foreground Fusion composite')
 
 def Main():
+	global grades
+
 	print('\n------------------')
 	print('Scratch 2 Fusion')
 	print('------------------')
@@ -303,32 +857,108 @@ def Main():
 	parser = argparse.ArgumentParser(
 		description='''Import Assimilate Scratch/LiveFX Construct content into BMD Fusion Studio via an XML importer.'''
 	)
-	parser.add_argument('xml_path', help='The path to your Scratch xml file')
+	parser.add_argument('xml_path', nargs='*', help='The path to your Scratch xml file. Several files and glob patterns such as "Temp/cmd-*.xml" can be given.')
+	parser.add_argument('--per-clip', action='store_true', help='Add each Loader node with individual scripting calls instead of a single batched paste')
+	parser.add_argument('--output-comp', metavar='COMP_PATH', help='Write the Loader nodes to a new Fusion .comp file instead of the foreground comp. Fusion does not need to be running.')
+	parser.add_argument('--new-comp', action='store_true', help='When several XML files are given, import each one into a new comp instead of an underlay in the foreground comp')
+	parser.add_argument('--plan', metavar='PLAN_PATH', help='Compile the import of the XML file into a JSON plan without connecting to Fusion')
+	parser.add_argument('--apply', nargs='?', const='', metavar='PLAN_PATH', help='Apply a saved plan, or the plan of the XML file, and only add or update the Loader nodes that differ from the comp')
+	parser.add_argument('--hosts', nargs='+', metavar='HOST', help='Import into new comps on several Fusion instances at once, one thread per host. Fusion has to allow network scripting on each host.')
+	parser.add_argument('--split-by', choices=SPLIT_KEYS, default='reel', help='How the shots are split into comps for --hosts (default: reel)')
+	parser.add_argument('--pipeline', type=int, nargs='?', const=ScratchPipeline.CHUNK_SIZE, metavar='CHUNK_SIZE', help='Parse the XML on a separate thread and send the shots to Fusion in chunks while the rest of the file is parsed (default chunk size: ' + str(ScratchPipeline.CHUNK_SIZE) + ')')
+	parser.add_argument('--sync', action='store_true', help='Only add the Scratch shots that are not in the comp yet, and update the Loader nodes of shots that changed')
+	parser.add_argument('--no-collapse', action='store_true', help='Add a Loader node for every shot, even when several shots use touching frame ranges of the same image sequence')
+	parser.add_argument('--preflight', action='store_true', help='Check that the media files exist and match the XML before anything is imported. Clips with missing media are skipped.')
+	parser.add_argument('--path-map', action='append', default=[], metavar='SRC=DST', help='Replace the SRC folder at the start of each media path with DST. Use media_path as SRC for the media folder of the Scratch project. Can be used more than once.')
+	parser.add_argument('--palette', metavar='JSON_PATH', help='A JSON file that overrides the Loader tile colors used for each Scratch note status')
+	parser.add_argument('--no-grade', action='store_true', help='Do not add ColorCorrector nodes for the Scratch primary grade of each clip')
+	parser.add_argument('--cache-size', type=float, metavar='MB', help='The size cap of the parsed XML cache in the Scratch temp folder, in MB (default: ' + str(ScratchCache.DEFAULT_CACHE_MB) + '). Use 0 to turn the cache off.')
+	parser.add_argument('--profile', metavar='JSON_PATH', help='Time each import stage and count the Fusion scripting calls. A summary table is printed and the results are saved to a JSON file.')
+	parser.add_argument('-v', '--verbose', action='count', default=0, help='Show the details of every clip. Use -vv for more.')
+	parser.add_argument('-q', '--quiet', action='count', default=0, help='Only show warnings and errors')
+	parser.add_argument('--log-file', metavar='LOG_PATH', help='Also write a detailed log to a rotating log file')
+	parser.add_argument('--watch', action='store_true', help='Keep running and import every new cmd-*.xml file that Scratch writes to the watch folder')
+	parser.add_argument('--watch-folder', action='append', default=[], metavar='FOLDER', help='A folder to monitor in --watch mode. Defaults to the folder that holds xml_path. Can be used more than once.')
 	args = parser.parse_args()
 
-	xml = args.xml_path
-	if xml:
-		if comp:
-			# Add a new undo history item
-			comp.StartUndo('Scratch to Fusion')
-	
-			# Stop file dialogs from appearing
-			comp.Lock()
-	
-			# Process the XML file
-			comp.Print('[XML Document] ' + xml + '\n\n')
-			mClipData = XML_Selection(xml)
-	
-			# Allow file dialogs to appear
-			comp.Unlock()
-	
-			#Close off the undo history item block
-			comp.EndUndo(True)
+	ScratchLog.Setup(args.verbose - args.quiet, args.log_file)
+
+	xmls = ScratchImport.CheckOptions(parser, args, paths, palette, 'Scratch 2 Fusion', {'--hosts': args.hosts, '--output-comp': args.output_comp})
+	if xmls is None:
+		return
+	grades = not args.no_grade
+
+	options = {
+		'batch': not args.per_clip,
+		'sync': args.sync,
+		'collapse': not args.no_collapse,
+		'preflight': args.preflight,
+	}
+
+	if args.hosts and (args.per_clip or args.output_comp or args.new_comp or args.sync or args.watch):
+		parser.error('--hosts can not be combined with --per-clip, --output-comp, --new-comp, --sync, or --watch')
+
+	if args.profile:
+		ScratchProfile.Enable()
+
+	try:
+		if args.plan or args.apply is not None:
+			if args.apply:
+				try:
+					plan = ScratchPlan.Load(args.apply, 'Fusion')
+				except (OSError, ValueError) as error:
+					log.error('[Plan] ' + str(error))
+					return
+			else:
+				plan = PlanXML(xmls[0], ScratchImport.PlanOptions(args), options['collapse'], options['preflight'])
+			if args.plan:
+				plan.Save(args.plan)
+			if args.apply is not None:
+				if Connect():
+					mClipData = ImportXML(plan)
+				else:
+					log.error('[Scratch 2 Fusion] Could not connect to the foreground Fusion composite')
+			log.info('[Done]')
+			return
+		elif args.hosts:
+			# Every partition is pasted into a new comp on one of the hosts
+			mClipData = XML_Hosts(xmls, args.hosts, args.split_by, options['collapse'], options['preflight'])
+			log.info('[Done]')
+			return
+		elif args.watch:
+			Watch(xmls, args.watch_folder, pipeline=args.pipeline, **options)
+			return
+		elif len(xmls) > 1:
+			if args.output_comp:
+				# Process the XML files offline
+				mClipData = XML_Files(xmls, comp_path=args.output_comp, **options)
+			elif Connect():
+				# Every XML file is imported over the same Fusion connection
+				mClipData = ImportXML(xmls, new_comp=args.new_comp, **options)
+			else:
+				log.error('[Scratch 2 Fusion] Could not connect to the foreground Fusion composite')
+			log.info('[Done]')
+			return
+
+		xml = xmls[0] if xmls else None
+		if args.output_comp:
+			# Process the XML file offline
+			log.info('[XML Document] ' + xml)
+			mClipData = XML_Selection(xml, comp_path=args.output_comp, **options)
+		elif ScratchWatch.DaemonRunning(os.path.dirname(os.path.abspath(xml)), WATCH_LOCK):
+			log.info('[Scratch 2 Fusion] The XML file will be imported by the running watch folder daemon')
+		elif xml:
+			if Connect():
+				mClipData = ImportXML(xml, pipeline=args.pipeline, **options)
+			else:
+				log.error('[Scratch 2 Fusion] Could not connect to the foreground Fusion composite')
 		else:
-			print('[Scratch 2 Fusion] Could not connect to the foreground Fusion composite')
-	else:
-		print('[Scratch 2 Fusion] XML filepath is invalid')
-	print('[Done]')
+			log.error('[Scratch 2 Fusion] XML filepath is invalid')
+		log.info('[Done]')
+	finally:
+		if args.profile:
+			ScratchProfile.PrintSummary()
+			ScratchProfile.Save(args.profile)
 
 if __name__ == '__main__':
 	Main()
@@ -71,6 +71,8 @@ If you click on the "Resolve Studio" custom command button and see the command p
 
 If you click on the "Resolve Studio" custom command button and see the command prompt based error message "the following arguments are required: xml_path" it means you need to go back and adjust the custom command parameters. Change the "XML Export:" setting to "Selection".
 
+The fusionscript library is looked up in the default DaVinci Resolve install folder. If Resolve is installed somewhere else, set the RESOLVE_SCRIPT_LIB environment variable to the full path of the fusionscript library (fusionscript.so or fusionscript.dll).
+
 # Script CLI Usage Example:
 
 It is possible to run the included "Scratch2Resolve.py" python script from the command-line.
@@ -83,6 +85,79 @@ python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Resolv
 Windows CLI Command:
 python "C:\Program Files\Assimilate\Settings\Script\Scratch2Resolve.py" "C:\ProgramData\Assimilator\Project\Project1\Temp\cmd-0.xml"
 
+# Script CLI Options:
+
+By default every clip is brought into the media pool with a single batched MediaPool.ImportMedia() call. Image sequences are imported with the file frame numbers of their Scratch in/out range as the StartIndex/EndIndex range, counted from the first frame named by the shot's file. See ScratchSequence.py for the files that are read as image sequences.
+
+Several XML files, or glob patterns that match them, can be imported in one run. The files are parsed in parallel and imported over a single Resolve connection. The clips of each file go into a "<group>/<construct>" bin named after the Scratch group and construct, and a summary is printed at the end.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Resolve.py" "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-*.xml"
+
+--per-clip
+	Import each clip with individual scripting calls (the original import behaviour).
+
+--bins <construct|reel|current>
+	Choose the media pool bin the clips are imported into. By default the clips go into a "<group>/<construct>" bin tree named after the Scratch group and construct, which is created when needed. "reel" adds a sub bin for the reel of each shot, and "current" imports into the bin that is selected in Resolve (the original import behaviour). The bin tree is indexed in memory as it is used, so the bin lookups do not cost a media pool walk per clip.
+
+--timeline
+	Conform the Scratch construct. A timeline named after the construct is created with the output resolution and frame rate of the Scratch project, and every imported shot is placed at its slot on the video track of its layer with a single batched AppendToTimeline call. Shots that were collapsed into one media pool item are still placed as separate timeline clips. The Scratch primary grade of each shot is applied to its timeline clip as an ASC CDL on the first node of the clip. A marker on the first frame records a hash of the slots, layers, frame ranges, and grades of the shots, so with --sync the timeline is only conformed again when one of them changes or media was added.
+
+--pipeline [<chunk size>]
+	Overlap the XML parsing with the Resolve work on large selections. A parser thread reads and prepares the shots while the previous chunk of shots is imported into the media pool, and only a few chunks are held in memory at once. Image sequences are only collapsed within a chunk. The chunk size defaults to 200 shots.
+
+--plan <plan.json>
+	Compile the import of the XML file into a plan without connecting to Resolve. The plan is a JSON file that lists every media pool item that the import creates, with its bin, clip color, and metadata, and the timeline clips of --timeline, so it can be reviewed before it is applied, or applied on another machine.
+
+--apply [<plan.json>]
+	Apply a plan saved with --plan, or the plan of the XML file when no plan file is given. The media pool items in the import bins are read once and compared with the plan, and only the missing or changed shots are imported or updated, as with --sync. The plans of XML files are cached by the contents of the file, so applying the same cmd-0.xml again skips the XML parsing. Give the XML file before --apply, or use --apply= to apply the plan of the XML file.
+
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Resolve.py" "/Library/Application Support/Assimilator/Project/LiveLink/Temp/cmd-0.xml" --timeline --plan "/tmp/cmd-0.plan.json"
+	python3 "/Library/Application Support/Assimilator/Defaults/Script/Scratch2Resolve.py" --apply "/tmp/cmd-0.plan.json"
+
+--sync
+	Incremental re-import. Each media pool item is tagged with the uuid of its Scratch shot. Shots that are already in the import bins (see --bins) are left alone, shots with a new note or note color are updated in place, shots with a new file or frame range are imported again, and only the new shots are added. The media pool items that were imported again are kept, as timelines may still use them: their Scratch tag is cleared and they are moved to a "Replaced Media" bin below the import bins.
+
+--delete-replaced
+	With --sync or --apply, delete the media pool items of shots with a new file or frame range instead of moving them to the "Replaced Media" bin. This also happens when a new shot extends a collapsed image sequence. Timeline clips that use the deleted items are removed by Resolve.
+
+--no-collapse
+	Shots that use touching or overlapping frame ranges of the same numbered image sequence (DPX, EXR, etc.) are normally merged into a single media pool item that covers the whole range. This option imports every shot instead.
+
+--preflight
+	Check the media before anything is sent to Resolve. The files (or the first and last frames of an image sequence) are checked in parallel, and the DPX, EXR, and QuickTime headers are compared with the resolution, frame rate, and handles in the XML. Clips with missing media are skipped and a report is printed.
+
+--path-map <SRC=DST>
+	Replace the SRC folder at the start of each media path with DST, for example when the Scratch project was set up on Windows and the media is mounted elsewhere on this system. Use "media_path" as SRC to remap the media folder of the Scratch project. Can be used more than once.
+
+	--path-map "X:/Media=/mnt/media" --path-map "media_path=/mnt/project"
+
+--palette <palette.json>
+	Override the clip colors used for the Scratch note status values. Each entry is named by the status number or color name ("0" to "9", "yellow", "red", ...), or "none" for shots without a note, and holds a "resolve" clip color name. See ScratchPalette.py for an example.
+
+--no-grade
+	Do not apply the Scratch primary grade of each shot to its --timeline clip.
+
+--cache-size <MB>
+	The parsed shots of every XML file are cached in a compact binary file in the "ScratchCache" folder of the Scratch temp_path, keyed by the contents of the file, so importing the same cmd-0.xml again skips the XML parsing. The least recently used files are removed when the cache grows past this size (256 MB by default, or the SCRATCH_CACHE_MB environment variable). Use 0 to turn the cache off.
+
+--profile <results.json>
+	Time each stage of the import (connecting to Resolve, reading the XML, parsing the shots, and the Resolve work) and count every scripting call. A summary table is printed at the end and the results are saved to the JSON file.
+
+-v, --verbose
+	Show the details of every clip. By default the per-clip details are not printed.
+
+-q, --quiet
+	Only show warnings and errors.
+
+--log-file <path.log>
+	Also write a detailed log, with the details of every clip, to a log file. The file is rotated when it reaches 5 MB.
+
+--watch
+	Keep running as a watch folder daemon. Every new "cmd-*.xml" file that Scratch writes to the watch folder is imported using the Resolve connection that is already open. While the daemon is running, the "Resolve Studio" custom command leaves the XML file to the daemon instead of importing it a second time. The folder named by the "watch_folder" attribute of an imported XML file is watched as well.
+
+--watch-folder <folder>
+	A folder to monitor in --watch mode. Defaults to the folder that holds the xml_path argument. Can be used more than once.
+
 
 # Script Copyright:
 
@@ -102,47 +177,58 @@ The original "s2nuke_v9.py" script was provided with the following license terms
 * CONTRIBUTORS ACCEPT NO RESPONSIBILITY IN ANY CONCEIVABLE MANNER.
 '''
 
-import xml.etree.ElementTree as ET
-import sys, os, argparse, json, re, glob, platform
+import os, argparse, hashlib
+
+import ScratchSession, ScratchXML, ScratchSequence, ScratchProfile, ScratchLog, ScratchWatch, ScratchPathMap, ScratchPalette, ScratchPipeline, ScratchPlan, ScratchCache, ScratchGrade, ScratchImport
+
+log = ScratchLog.log
+
+# Media path mapping, filled in by Main() from the --path-map options
+paths = ScratchPathMap.PathMap()
 
-import warnings
-warnings.filterwarnings('ignore', category=DeprecationWarning)
+# Note colors, built once per run. Main() adds the --palette overrides.
+palette = ScratchPalette.Palette()
 
-# The imp library will be depreciated in Python 3.12. Look for a replacement option at that time.
-import imp
+# Apply the Scratch primary grade of each shot to its timeline clip. Main() turns this off for --no-grade.
+grades = True
+
+# Delete the media pool items of re-imported shots rather than moving them to the REPLACED_BIN. Main() turns this on for --delete-replaced.
+delete_replaced = False
+
+# Shared fusionscript connection for the whole run
+session = ScratchSession.Session('Resolve')
 
 def FuScriptLib():
-	lib_path = ''
-	if sys.platform.startswith('darwin'):
-		lib_path = '/Applications/DaVinci Resolve/DaVinci Resolve.app/Contents/Libraries/Fusion/fusionscript.so'
-	elif sys.platform.startswith('win'):
-		lib_path = 'C:\\Program Files\\Blackmagic Design\\DaVinci Resolve\\fusionscript.dll'
-	elif sys.platform.startswith('linux'):
-		lib_path = '/opt/resolve/libs/Fusion/fusionscript.so'
-
-	if not os.path.isfile(lib_path):
-		print('[Resolve Studio] [Library Does Not Exist on Disk]', lib_path)
-
-	bmd = imp.load_dynamic('fusionscript', lib_path)
-	if bmd:
-		sys.modules[__name__] = bmd
-	else:
-		raise ImportError('[Resolve Studio] Could not locate module dependencies')
-	return bmd
+	return session.Lib()
 
 def Resolve():
-	app = FuScriptLib().scriptapp('Resolve')
+	app = session.App('Resolve')
 	return app
 
 def Fusion():
-	app = FuScriptLib().scriptapp('Fusion', 'localhost')
+	app = session.App('Fusion', 'localhost')
 	return app
 
-# Get the Fusion objects
-resolve = Resolve()
-res = Resolve()
-app = Resolve()
-bmd = FuScriptLib()
+# The Resolve objects are filled in by Connect()
+resolve = None
+res = None
+app = None
+bmd = None
+
+def Connect():
+	global resolve, res, app, bmd
+
+	with ScratchProfile.Stage('Connect'):
+		# Get the Resolve objects
+		resolve = Resolve()
+		res = resolve
+		app = resolve
+		bmd = FuScriptLib()
+
+		# Open the current project and media pool
+		if resolve:
+			GetMediaPool()
+	return resolve
 
 def GetTimeline():
 	project = GetProject()
@@ -156,170 +242,545 @@ def GetTimeline():
 	return timeline
 
 def GetProject():
-	# Get the current Resolve timeline
-	resolve = Resolve()
-	projectManager = resolve.GetProjectManager()
-	project = projectManager.GetCurrentProject()
-	return project
+	# Get the current Resolve project
+	return session.Project()
 
 def GetMediaPool():
-	resolve = Resolve()
-	projectManager = resolve.GetProjectManager()
-	project = projectManager.GetCurrentProject()
-	mediapool = project.GetMediaPool()
-	return mediapool
-
-def GetFolder(parentFolder, childFolder, mediapool):
-	if parentFolder != None:
-		for folder in parentFolder.GetSubFolderList():
-			if folder.GetName() == childFolder:
-				return folder
-		else:
-			return mediapool.AddSubFolder(parentFolder, childFolder)
-	else:
+	return session.MediaPool()
+
+class FolderIndex:
+	# An in-memory index of the media pool bin tree, keyed by the tuple of bin names from the root folder.
+	# The sub folders of a bin are listed the first time a lookup reaches it, and the bins created by the
+	# script are added as they are made, so repeated lookups make no scripting calls.
+	def __init__(self, mediapool):
+		self.mediapool = mediapool
+		self.folders = {(): mediapool.GetRootFolder()}
+		self.children = {}
+
+	def Children(self, path):
+		children = self.children.get(path)
+		if children is None:
+			children = {}
+			for folder in (self.folders[path].GetSubFolderList() or []):
+				children.setdefault(folder.GetName(), folder)
+			self.children[path] = children
+		return children
+
+	def Folder(self, path):
+		# The bin at a path of bin names, created when needed
+		folder = self.folders.get(path)
+		if folder is not None:
+			return folder
+		parent = self.Folder(path[:-1])
+		children = self.Children(path[:-1])
+		folder = children.get(path[-1])
+		if folder is None:
+			folder = self.mediapool.AddSubFolder(parent, path[-1])
+			if not folder:
+				log.error('[Bins] Could not create the bin ' + '/'.join(path))
+				return parent
+			children[path[-1]] = folder
+			self.children[path] = {}
+		self.folders[path] = folder
+		return folder
+
+	def Walk(self, path):
+		# Yield the bin at path and every bin below it
+		self.Folder(path)
+		yield self.folders[path]
+		for name in list(self.Children(path)):
+			yield from self.Walk(path + (name,))
+
+# The bin index for the current media pool, made by GetBins()
+folder_index = None
+
+def GetBins():
+	global folder_index
+	mediapool = GetMediaPool()
+	if folder_index is None or folder_index.mediapool is not mediapool:
+		folder_index = FolderIndex(mediapool)
+	return folder_index
+
+# --bins choices: the Scratch group/construct bins, the same with a bin per reel, or the current bin
+BIN_MODES = ('construct', 'reel', 'current')
+
+def BinPath(project, shot=None, bins='construct'):
+	# The bin names for a shot, or None to use the current bin
+	if bins == 'current':
 		return None
+	path = tuple(name for name in (project.group_name, project.construct_name) if name)
+	if bins == 'reel' and shot is not None and shot.reel_id and shot.reel_id.strip():
+		path += (shot.reel_id.strip(),)
+	return path
+
+def SetBin(path):
+	if path is not None:
+		GetMediaPool().SetCurrentFolder(GetBins().Folder(path))
 
-def ImportMedia(clip_dict):
-	print(clip_dict)
+def ImportMedia(shot):
+	log.debug('[Clip] ' + str(shot))
 	project = GetProject()
 	mediapool = GetMediaPool()
 
-	mpItems = mediapool.ImportMedia([clip_dict['file']])
+	mpItems = mediapool.ImportMedia([shot.file])
 	if not mpItems:
-		return
+		return []
 	for mpItem in mpItems:
-		mpItem.SetClipProperty('StartIndex', clip_dict['in'])
-		mpItem.SetClipProperty('EndIndex', clip_dict['out'])
-		mpItem.SetClipProperty('Description', clip_dict['note'])
+		mpItem.SetClipProperty('StartIndex', shot.frame_in)
+		mpItem.SetClipProperty('EndIndex', shot.frame_out)
+		mpItem.SetClipProperty('Description', shot.note)
 
 		# Clip Color
-		if clip_dict['note_color'] == None:
-			color = 'Blue'
-		elif clip_dict['note_color'] == '0':
-			color = 'Yellow'
-		elif clip_dict['note_color'] == '1':
-			color = 'Pink'
-		elif clip_dict['note_color'] == '2':
-			color = 'Green'
-		elif clip_dict['note_color'] == '3':
-			color = 'Blue'
-		elif clip_dict['note_color'] == '4':
-			color = 'Violet'
-		elif clip_dict['note_color'] == '5':
-			color = 'Orange'
-		elif clip_dict['note_color'] == '6':
-			color = 'Teal'
-		elif clip_dict['note_color'] == '7':
-			color = 'Pink'
-		elif clip_dict['note_color'] == '8':
-			color = 'Chocolate'
-		elif clip_dict['note_color'] == '9':
-			color = 'Tan'
+		mpItem.SetClipColor(palette.ClipColor(shot.note_color))
+
+		# Tag the item with the Scratch shot for later --sync runs
+		mpItem.SetThirdPartyMetadata(ScratchMetadata(shot))
+	return [(shot, mpItems[0])]
+
+def ScratchMetadata(shot):
+	# Third party metadata stored on each media pool item to identify its Scratch shot
+	return {
+		'Scratch UUID': shot.uuid,
+		'Scratch Hash': ScratchXML.ShotHash(shot),
+		'Scratch Media Hash': ScratchXML.ShotHash(shot, ScratchXML.MEDIA_KEYS),
+	}
+
+def ApplyMetadata(mpItem, shot):
+	# Apply the Scratch metadata with a single call per property group
+	mpItem.SetMetadata({'Description': shot.note or ''})
+	mpItem.SetClipColor(palette.ClipColor(shot.note_color))
+	mpItem.SetThirdPartyMetadata(ScratchMetadata(shot))
+
+def ItemKey(filepath, still):
+	# A lookup key that matches a clip file with the "File Path" Resolve reports for it
+	folder, name = os.path.split(filepath.replace('\\', '/'))
+	match = ScratchSequence.SEQUENCE_FILE.match(name)
+	if still and match:
+		name = match.group(1) + match.group(3)
+	return (folder, name)
+
+def ImportMediaBatch(shots):
+	mediapool = GetMediaPool()
+
+	# Build one clipInfo entry per shot
+	clip_infos = []
+	for shot in shots:
+		pattern = ScratchSequence.Pattern(shot)
+		if pattern:
+			first, last = ScratchSequence.FileRange(shot)
+			clip_infos.append({'FilePath': pattern, 'StartIndex': first, 'EndIndex': last})
+		else:
+			clip_infos.append({'FilePath': shot.file})
+
+	if not clip_infos:
+		return []
+
+	# Import all of the footage with a single call
+	mpItems = mediapool.ImportMedia(clip_infos)
+	if not mpItems:
+		return []
+
+	# Each clipInfo entry is imported as one media pool item. If any of the files failed to import, match the items by path instead.
+	if len(mpItems) == len(shots):
+		pairs = list(zip(shots, mpItems))
+	else:
+		items_by_key = {}
+		for mpItem in mpItems:
+			filepath = mpItem.GetClipProperty('File Path') or ''
+			items_by_key[ItemKey(filepath, False)] = mpItem
+			items_by_key[ItemKey(filepath, True)] = mpItem
+		pairs = []
+		for shot in shots:
+			key = ItemKey(shot.file, ScratchSequence.Sequence(shot) is not None)
+			if key in items_by_key:
+				pairs.append((shot, items_by_key[key]))
+
+	for shot, mpItem in pairs:
+		ApplyMetadata(mpItem, shot)
+
+	log.info('[Media Imported] ' + str(len(pairs)) + ' of ' + str(len(shots)) + ' clips')
+	return pairs
+
+def MediaPoolIndex(folders):
+	# Map the Scratch shot uuid to each media pool item already in the folders
+	index = {}
+	for folder in folders:
+		for mpItem in (folder.GetClipList() or []):
+			metadata = mpItem.GetThirdPartyMetadata() or {}
+			if metadata.get('Scratch UUID'):
+				index[metadata['Scratch UUID']] = (mpItem, metadata)
+	return index
+
+def ImportShots(project, shots, batch=True, bins='construct'):
+	# Import the shots into their bins, with one ImportMedia call per bin. Returns the (shot, media pool item) pairs.
+	groups = {}
+	for shot in shots:
+		groups.setdefault(BinPath(project, shot, bins), []).append(shot)
+	pairs = []
+	for path, group in groups.items():
+		with ScratchProfile.Stage('Bins'):
+			SetBin(path)
+		if batch:
+			pairs.extend(ImportMediaBatch(group))
+		else:
+			for shot in group:
+				pairs.extend(ImportMedia(shot))
+	return pairs
+
+# The bin below the import bins that --sync moves the media pool items of re-imported shots to
+REPLACED_BIN = 'Replaced Media'
+
+def RetireItems(project, mpItems, bins='construct'):
+	# The media pool items of shots whose file or frame range changed. Timelines may still use them, so unless
+	# --delete-replaced is given, their Scratch tag is cleared and they are moved to the REPLACED_BIN.
+	mediapool = GetMediaPool()
+	if delete_replaced:
+		mediapool.DeleteClips(mpItems)
+		log.info('[Sync] ' + str(len(mpItems)) + ' replaced clips deleted')
+		return
+	for mpItem in mpItems:
+		mpItem.SetThirdPartyMetadata('Scratch UUID', '')
+	path = (BinPath(project, bins=bins) or ()) + (REPLACED_BIN,)
+	if mediapool.MoveClips(mpItems, GetBins().Folder(path)):
+		log.info('[Sync] ' + str(len(mpItems)) + ' replaced clips moved to the ' + '/'.join(path) + ' bin')
+	else:
+		log.warning('[Sync] ' + str(len(mpItems)) + ' replaced clips could not be moved to the ' + '/'.join(path) + ' bin')
+
+def SyncIndex(project, bins='construct'):
+	# The MediaPoolIndex() of the import bins of the project
+	path = BinPath(project, bins=bins)
+	if path is None:
+		folders = [GetMediaPool().GetCurrentFolder()]
+	else:
+		# The reel bins are below the construct bin
+		folders = list(GetBins().Walk(path))
+	return MediaPoolIndex(folders)
+
+def SyncMedia(project, shots, bins='construct', counts=None, index=None):
+	# Only import the new shots and update the changed ones. The added and updated counts are added to counts. index is
+	# the SyncIndex() of the bins, which is built here when it is not given.
+	mediapool = GetMediaPool()
+	if index is None:
+		index = SyncIndex(project, bins)
+	added = []
+	replaced = []
+	pairs = []
+	updated = 0
+	for shot in shots:
+		existing = index.get(shot.uuid)
+		if existing is None:
+			added.append(shot)
+			continue
+
+		mpItem, metadata = existing
+		if metadata.get('Scratch Hash') == ScratchXML.ShotHash(shot):
+			pairs.append((shot, mpItem))
+			continue
+		if metadata.get('Scratch Media Hash') != ScratchXML.ShotHash(shot, ScratchXML.MEDIA_KEYS):
+			# The file or frame range changed, so the item has to be imported again
+			replaced.append(mpItem)
+			added.append(shot)
+		else:
+			ApplyMetadata(mpItem, shot)
+			pairs.append((shot, mpItem))
+			updated += 1
+
+	if replaced:
+		RetireItems(project, replaced, bins)
+	if added:
+		pairs.extend(ImportShots(project, added, True, bins))
+	log.info('[Sync] ' + str(len(added)) + ' added, ' + str(updated) + ' updated, ' + str(len(shots) - len(added) - updated) + ' unchanged')
+	if counts is not None:
+		counts['added'] = counts.get('added', 0) + len(added)
+		counts['updated'] = counts.get('updated', 0) + updated
+	return pairs
+
+def TimelineFormat(timeline, project):
+	# Use the output resolution and frame rate of the Scratch project for the timeline
+	settings = {}
+	if project.width and project.height:
+		settings['timelineResolutionWidth'] = str(project.width)
+		settings['timelineResolutionHeight'] = str(project.height)
+	if project.fps:
+		settings['timelineFrameRate'] = '%g' % project.fps
+	if settings:
+		timeline.SetSetting('useCustomSettings', '1')
+		for name, value in settings.items():
+			timeline.SetSetting(name, value)
+
+def CreateTimeline(name):
+	# CreateEmptyTimeline() fails when the name is taken, so a number is added until it succeeds
+	mediapool = GetMediaPool()
+	for index in range(1, 100):
+		timeline_name = name if index == 1 else name + ' ' + str(index)
+		timeline = mediapool.CreateEmptyTimeline(timeline_name)
+		if timeline:
+			return timeline, timeline_name
+	return None, name
+
+def TimelineName(project):
+	return project.construct_name or project.name or 'Scratch'
+
+# The shot fields that change the timeline. A marker at the start of each conformed timeline holds their hash.
+TIMELINE_KEYS = ('uuid', 'slot', 'layer', 'frame_in', 'frame_out', 'grade')
+TIMELINE_MARKER = 'Scratch Conform '
+
+def TimelineHash(shots):
+	# The hash of the placement and grade of every shot on the timeline
+	digest = hashlib.sha1()
+	for shot in shots:
+		digest.update(ScratchXML.ShotHash(shot, TIMELINE_KEYS).encode('utf-8'))
+	return digest.hexdigest()
+
+def ConformedTimeline(timeline_hash):
+	# The timeline of the current project that was conformed from the same shots, or None
+	project = GetProject()
+	for index in range(1, (project.GetTimelineCount() or 0) + 1):
+		timeline = project.GetTimelineByIndex(index)
+		for marker in (timeline.GetMarkers() or {}).values():
+			if marker.get('customData') == TIMELINE_MARKER + timeline_hash:
+				return timeline
+	return None
+
+def BuildTimeline(project, shots, pairs):
+	# Conform the Construct: every shot is placed at its slot on the video track of its layer with a single AppendToTimeline() call.
+	# shots are the parsed shots before they were collapsed, and pairs the imported (shot, media pool item) pairs.
+	items = {}
+	for item_shot, mpItem in pairs:
+		items[item_shot.uuid] = (item_shot, mpItem)
+		for uuid in (item_shot.merged or []):
+			items[uuid] = (item_shot, mpItem)
+
+	timeline, name = CreateTimeline(TimelineName(project))
+	if not timeline:
+		log.error('[Timeline] Could not create the timeline ' + name)
+		return None
+	TimelineFormat(timeline, project)
+	start = timeline.GetStartFrame()
+
+	clip_infos = []
+	placed = []
+	tracks = 1
+	for shot in shots:
+		entry = items.get(shot.uuid)
+		if entry is None:
+			continue
+		item_shot, mpItem = entry
+		# A collapsed image sequence item starts at the first frame of the run, and a movie file at frame 0
+		if ScratchSequence.Sequence(item_shot):
+			offset = shot.frame_in - item_shot.frame_in
 		else:
-			color = 'Blue'
-
-		mpItem.SetClipColor(color)
-
-
-def ParseClip(clip, clip_NB, clips_dict):
-	clip_dict = {}
-	clip_dict['uuid'] = clip.attrib['uuid']
-	clip_dict['slot']='0'
-	if 'type' in clip.attrib:
-		clip_dict['type'] = clip.attrib['type']
-	if 'slot' in clip.attrib:
-		clip_dict['slot'] = clip.attrib['slot']
-	if 'slot_len' in clip.attrib:
-		clip_dict['slot_len'] = clip.attrib['slot_len']
-	if 'layer' in clip.attrib:
-		clip_dict['layer'] = clip.attrib['layer']
-	if 'frame_no' in clip.attrib:
-		clip_dict['frame_no'] = clip.attrib['frame_no']  # Only on the First clip of selection
-	if 'frame_file' in clip.attrib:
-		# Only on the First clip of selection
-		clip_dict['frame_file'] = clip.attrib['frame_file']
-
-	clip_dict['file'] = clip.find('file').text
-	clip_dict['format'] = clip_dict['file'][-3:]
-	clip_dict['name'] = clip.find('name').text
-
-	# Remove any version numbers scratch might have added to the name
-	idx = clip_dict['name'].find('[')
-	if idx > 0:
-		clip_dict['name'] = clip_dict['name'][0:idx]
-	clip_dict['reel_id'] = ' '
-
-	if clip.find('reel_id') is not None:
-		clip_dict['reel_id'] = clip.find('reel_id').text
-
-	clip_handles = clip.find('handles')
-	clip_dict['in'] = clip_handles.find('in').text
-	clip_dict['out'] = clip_handles.find('out').text
-	clip_dict['length'] = clip.find('length').text
-
-	clip_size = clip.find('size')
-	clip_dict['width'] = clip_size.find('width').text
-	clip_dict['height'] = clip_size.find('height').text
-	clip_dict['aspect'] = '1'
-	if clip.find('aspect') is not None:
-		clip_dict['aspect'] = clip.find('aspect').text
-	clip_dict['fps'] = clip.find('fps').text
-	clip_dict['timecode'] = clip.find('timecode').text
-	ColorGrade = clip.find('colorgrade')
-	Input = ColorGrade.find('input')
-
-	clip_dict['note'] = ''
-	clip_dict['note_color'] = clip.find('note_color')
-
-	if clip.find('notes') is not None:
-		notes = clip.find('notes')
-		note = notes.find('note')
-		clip_dict['note_color'] = note.attrib['status']
-		clip_dict['note'] = note.text
+			offset = shot.frame_in
+		duration = ScratchXML.SlotLength(shot)
+		clip_infos.append({
+			'mediaPoolItem': mpItem,
+			'startFrame': offset,
+			'endFrame': offset + duration - 1,
+			'mediaType': 1,
+			'trackIndex': shot.layer + 1,
+			'recordFrame': start + shot.slot,
+		})
+		placed.append(shot)
+		tracks = max(tracks, shot.layer + 1)
+
+	for track in range(timeline.GetTrackCount('video') or 1, tracks):
+		timeline.AddTrack('video')
+
+	appended = (GetMediaPool().AppendToTimeline(clip_infos) if clip_infos else None) or []
+	if len(appended) == len(placed):
+		# AppendToTimeline() returns the timeline items in the order of the clip infos
+		items = list(zip(placed, appended))
+	else:
+		# Some of the clips could not be placed, so match the items by their track and record frame instead
+		places = dict(((clip_info['trackIndex'], clip_info['recordFrame']), shot) for clip_info, shot in zip(clip_infos, placed))
+		items = [(places.get((item.GetTrackTypeAndIndex()[1], item.GetStart())), item) for item in appended if item]
+	graded = 0
+	for shot, item in items:
+		if shot and item and shot.grade and item.SetCDL(ScratchGrade.ResolveCDL(shot.grade)):
+			graded += 1
+	if len(appended) == len(placed):
+		# Mark the timeline with the hash of its shots, so a --sync run can tell that it is still up to date
+		timeline.AddMarker(0, 'Blue', 'Scratch', 'Conformed from the Scratch construct', 1, TIMELINE_MARKER + TimelineHash(shots))
+	GetProject().SetCurrentTimeline(timeline)
+	log.info('[Timeline] ' + name + ': ' + str(len(appended)) + ' of ' + str(len(shots)) + ' shots placed, ' + str(graded) + ' graded')
+	return timeline
 
+def ConformTimeline(project, shots, pairs, counts=None):
+	# Build the timeline of the construct. After a sync, where counts holds the sync counts, the timeline is only
+	# conformed again when media was added, or when no timeline was conformed from shots with the same slots,
+	# layers, frame ranges, and grades.
+	if counts is not None and not counts.get('added'):
+		timeline = ConformedTimeline(TimelineHash(shots))
+		if timeline:
+			log.info('[Timeline] ' + timeline.GetName() + ' is up to date')
+			return timeline
+	with ScratchProfile.Stage('Build Timeline'):
+		return BuildTimeline(project, shots, pairs)
+
+def PrepareShots(project, shots, collapse=True, preflight=False):
+	# The grade is applied to each timeline clip, so shots with different grades can still share a media pool item
+	return ScratchImport.PrepareShots(project, shots, paths, collapse, preflight, grades)
+
+def SendShots(project, shots, batch=True, sync=False, bins='construct', counts=None, index=None):
+	# Returns the (shot, media pool item) pairs. The sync counts are added to counts.
+	if sync:
+		# Import the new and changed footage
+		with ScratchProfile.Stage('Sync Media'):
+			return SyncMedia(project, shots, bins, counts, index)
 	# Import the footage
-	ImportMedia(clip_dict)
-
-def XML_Selection(xml):
-	clip_NB = 1
-	xml_infos = {}
-	project={}
-
-	tree = ET.parse(xml)
-	root = tree.getroot()
-
-	project['datetime'] = root.attrib['datetime']
-	project['version'] = root.attrib['version']
-	project['name'] =  root.attrib['project']
-	project['project_path'] =  root.attrib['project_path']
-	project['media_path'] =  root.attrib['media_path']
-	project['temp_path'] = root.attrib['temp_path']
-	project['watch_folder'] =  root.attrib['watch_folder'].replace('\\', '/')
-	xml_infos['project'] = project
-
-	output = root.find('output')
-	outputRes = output.find('resolution')
-	outputWidth=outputRes.find('w').text
-	outputHeight=outputRes.find('h').text
-
-	xml_infos['output_res'] = [outputWidth,outputHeight]
-	xml_infos['output_fps'] = output.find('fps').text
-
-	Selection = root.find('selection')
-	group = Selection.attrib['group']
-	xml_infos['group_name'] =  group
-	construct = Selection.attrib['construct']
-	xml_infos['construct_name'] = construct
-	clips = Selection.findall('shot')
-
-	print('[Importing Media]\n')
-	clips_dict = {}
-	for clip in clips:
-		ParseClip(clip, clip_NB, clips_dict)
-
-	return xml_infos
+	with ScratchProfile.Stage('Import Media'):
+		return ImportShots(project, shots, batch, bins)
+
+def XML_Selection(xml, batch=True, sync=False, collapse=True, preflight=False, bins='construct', timeline=False, pipeline=None):
+	if pipeline:
+		return XML_Pipeline(xml, batch, sync, collapse, preflight, bins, timeline, pipeline)
+	project = ScratchXML.Project()
+
+	log.info('[Importing Media]')
+	# Shots are parsed as they are streamed from the XML document
+	parsed = ScratchCache.ReadShots(xml, project)
+	shots = PrepareShots(project, parsed, collapse, preflight)
+	counts = {} if sync else None
+	pairs = SendShots(project, shots, batch, sync, bins, counts)
+
+	if timeline:
+		ConformTimeline(project, parsed, pairs, counts)
+
+	# Resolve has no console for external scripts, so the messages have already been shown in the terminal
+	ScratchLog.Flush()
+	return project
+
+def XML_Pipeline(xml, batch=True, sync=False, collapse=True, preflight=False, bins='construct', timeline=False, chunk_size=ScratchPipeline.CHUNK_SIZE):
+	# Parse and prepare the shots on a parser thread while the previous chunk is imported into Resolve.
+	# Image sequences are only collapsed within a chunk.
+	project = ScratchXML.Project()
+	parsed_shots = []
+	pairs = []
+	counts = {} if sync else None
+	index = None
+
+	log.info('[Importing Media]')
+	chunks = ScratchPipeline.ShotChunks(xml, project, lambda shots: PrepareShots(project, shots, collapse, preflight), chunk_size)
+	for parsed, shots in ScratchPipeline.Pipeline(chunks):
+		if sync and index is None:
+			# The import bins are named after the construct, which is known once the first chunk is parsed. They are
+			# indexed once, not for every chunk, as the uuids of the shots are unique.
+			with ScratchProfile.Stage('Sync Media'):
+				index = SyncIndex(project, bins)
+		pairs.extend(SendShots(project, shots, batch, sync, bins, counts, index))
+		if timeline:
+			parsed_shots.extend(parsed)
+	log.info('[Pipeline] ' + str(len(pairs)) + ' clips imported in chunks of ' + str(chunk_size))
+
+	if timeline:
+		ConformTimeline(project, parsed_shots, pairs, counts)
+
+	ScratchLog.Flush()
+	return project
+
+def CompilePlan(xml, collapse=True, preflight=False, bins='construct', timeline=False):
+	# Phase one of a --plan or --apply import: the media pool items and timeline clips of the XML document, without connecting to Resolve
+	project = ScratchXML.Project()
+	parsed = ScratchCache.ReadShots(xml, project)
+	shots = PrepareShots(project, parsed, collapse, preflight)
+
+	plan = ScratchPlan.Plan('Resolve', xml, project)
+	with ScratchProfile.Stage('Compile Plan'):
+		for shot in shots:
+			plan.Add('import', uuid=shot.uuid, hash=ScratchXML.ShotHash(shot), bin=BinPath(project, shot, bins), clip_color=palette.ClipColor(shot.note_color), shot=ScratchPlan.ShotRecord(shot))
+		if timeline:
+			# The timeline places every parsed shot, including the ones collapsed into a single media pool item
+			for shot in parsed:
+				plan.Add('place', uuid=shot.uuid, track=shot.layer + 1, record_frame=shot.slot, shot=ScratchPlan.ShotRecord(shot))
+	return plan
+
+def PlanXML(xml, options, collapse=True, preflight=False, bins='construct', timeline=False):
+	# The plan of an XML document, reused from the plan cache when the file and options have not changed. Preflight
+	# plans depend on the media on disk, so they are always compiled again.
+	return ScratchPlan.Compile('Resolve', xml, options, lambda: CompilePlan(xml, collapse, preflight, bins, timeline), cache=not preflight)
+
+def ApplyPlan(plan):
+	# Phase two: compare the plan with the media pool items in its bins, only import or update the shots that
+	# differ, and conform the timeline
+	project = plan.project
+	imports = plan.Operations('import')
+	shots = []
+	for op in imports:
+		shot = ScratchPlan.RecordShot(op['shot'])
+		# Use the clip color of the plan rather than the local palette
+		palette.Set(shot.note_color, clip_color=op['clip_color'])
+		shots.append(shot)
+
+	counts = {}
+	with ScratchProfile.Stage('Sync Media'):
+		pairs = SyncMedia(project, shots, plan.options.get('bins', 'construct'), counts)
+
+	places = plan.Operations('place')
+	if places:
+		ConformTimeline(project, [ScratchPlan.RecordShot(op['shot']) for op in places], pairs, counts)
+
+	ScratchLog.Flush()
+	return project
+
+def BinName(project, bins='construct'):
+	path = BinPath(project, bins=bins)
+	if path is None:
+		return 'Current Bin'
+	return '/'.join(('Master',) + path)
+
+def XML_Files(xmls, batch=True, sync=False, collapse=True, preflight=False, bins='construct', timeline=False):
+	# Import several XML documents over the open Resolve connection. The documents are parsed in parallel first,
+	# then each one is imported into the bins named after its Scratch group and construct.
+	results = []
+
+	log.info('[Importing Media]')
+	with ScratchProfile.Stage('Parse XML Files'):
+		parsed = list(ScratchXML.ParseXMLs(xmls, parse=ScratchCache.ParseXML))
+
+	for xml, project, parsed_shots, error in parsed:
+		if error is not None:
+			results.append((xml, None, 0, error))
+			continue
+		log.info('[XML Document] ' + xml)
+		shots = PrepareShots(project, parsed_shots, collapse, preflight)
+		counts = {} if sync else None
+		pairs = SendShots(project, shots, batch, sync, bins, counts)
+		if timeline:
+			ConformTimeline(project, parsed_shots, pairs, counts)
+		results.append((xml, BinName(project, bins), len(shots), None))
+
+	ScratchLog.Summary(results, 'Bin')
+	ScratchLog.Flush()
+	return results
+
+# Lock file that the --watch daemon keeps in each watched folder
+WATCH_LOCK = 'Scratch2Resolve.watch'
+
+def ImportXML(xml, **options):
+	# Open the Media page
+	resolve.OpenPage('media')
+
+	# Process the XML file, each file of a list, or a compiled plan
+	if isinstance(xml, ScratchPlan.Plan):
+		return ApplyPlan(xml)
+	if isinstance(xml, list):
+		return XML_Files(xml, **options)
+	log.info('[XML Document] ' + xml)
+	mClipData = XML_Selection(xml, **options)
+	return mClipData
+
+def Reconnect():
+	# Pick up the current project, reusing the open Resolve connection, or connect again when Resolve was not running
+	# or was restarted
+	session.Reset()
+	return Connect() and GetProject()
+
+def Watch(xmls, folders, **options):
+	ScratchImport.Watch(xmls, folders, WATCH_LOCK, Reconnect, lambda xml: ImportXML(xml, **options), 'Scratch 2 Resolve', 'Could not connect to the active Resolve session')
 
 def Main():
+	global grades, delete_replaced
+
 	print('\n------------------')
 	print('Scratch 2 Resolve')
 	print('------------------')
@@ -327,25 +788,98 @@ def Main():
 	parser = argparse.ArgumentParser(
 		description='''Import Assimilate Scratch/LiveFX Construct content into BMD Resolve Studio via an XML importer.'''
 	)
-	parser.add_argument('xml_path', help='The path to your Scratch xml file')
+	parser.add_argument('xml_path', nargs='*', help='The path to your Scratch xml file. Several files and glob patterns such as "Temp/cmd-*.xml" can be given.')
+	parser.add_argument('--per-clip', action='store_true', help='Import each clip with individual scripting calls instead of a single batched import')
+	parser.add_argument('--bins', choices=BIN_MODES, default='construct', help='Import into "group/construct" bins named from the Scratch XML (the default), the same with a sub bin per reel, or the current bin')
+	parser.add_argument('--timeline', action='store_true', help='Also build a timeline named after the Scratch construct, with every shot placed on the track of its layer at its slot')
+	parser.add_argument('--pipeline', type=int, nargs='?', const=ScratchPipeline.CHUNK_SIZE, metavar='CHUNK_SIZE', help='Parse the XML on a separate thread and import the shots into Resolve in chunks while the rest of the file is parsed (default chunk size: ' + str(ScratchPipeline.CHUNK_SIZE) + ')')
+	parser.add_argument('--plan', metavar='PLAN_PATH', help='Compile the import of the XML file into a JSON plan without connecting to Resolve')
+	parser.add_argument('--apply', nargs='?', const='', metavar='PLAN_PATH', help='Apply a saved plan, or the plan of the XML file, and only import or update the clips that differ from the media pool')
+	parser.add_argument('--sync', action='store_true', help='Only import the Scratch shots that are not in the import bins yet, and update the media pool items of shots that changed')
+	parser.add_argument('--delete-replaced', action='store_true', help='With --sync or --apply, delete the media pool items of shots that are imported again instead of moving them to the "' + REPLACED_BIN + '" bin')
+	parser.add_argument('--no-collapse', action='store_true', help='Import every shot, even when several shots use touching frame ranges of the same image sequence')
+	parser.add_argument('--preflight', action='store_true', help='Check that the media files exist and match the XML before anything is imported. Clips with missing media are skipped.')
+	parser.add_argument('--path-map', action='append', default=[], metavar='SRC=DST', help='Replace the SRC folder at the start of each media path with DST. Use media_path as SRC for the media folder of the Scratch project. Can be used more than once.')
+	parser.add_argument('--palette', metavar='JSON_PATH', help='A JSON file that overrides the clip colors used for each Scratch note status')
+	parser.add_argument('--no-grade', action='store_true', help='Do not apply the Scratch primary grade of each shot to its timeline clip as a CDL')
+	parser.add_argument('--cache-size', type=float, metavar='MB', help='The size cap of the parsed XML cache in the Scratch temp folder, in MB (default: ' + str(ScratchCache.DEFAULT_CACHE_MB) + '). Use 0 to turn the cache off.')
+	parser.add_argument('--profile', metavar='JSON_PATH', help='Time each import stage and count the Resolve scripting calls. A summary table is printed and the results are saved to a JSON file.')
+	parser.add_argument('-v', '--verbose', action='count', default=0, help='Show the details of every clip. Use -vv for more.')
+	parser.add_argument('-q', '--quiet', action='count', default=0, help='Only show warnings and errors')
+	parser.add_argument('--log-file', metavar='LOG_PATH', help='Also write a detailed log to a rotating log file')
+	parser.add_argument('--watch', action='store_true', help='Keep running and import every new cmd-*.xml file that Scratch writes to the watch folder')
+	parser.add_argument('--watch-folder', action='append', default=[], metavar='FOLDER', help='A folder to monitor in --watch mode. Defaults to the folder that holds xml_path. Can be used more than once.')
 	args = parser.parse_args()
 
-	xml = args.xml_path
-	if xml:
-		if app:
-			# Open the Media page
-			resolve.OpenPage('media')
-	
-			project = GetProject()
-			mediapool = GetMediaPool()
-
-			print('[XML Document] ' + xml + '\n\n')
-			mClipData = XML_Selection(xml)
+	ScratchLog.Setup(args.verbose - args.quiet, args.log_file)
+
+	if args.delete_replaced and not (args.sync or args.apply is not None):
+		parser.error('--delete-replaced can only be used with --sync or --apply')
+	xmls = ScratchImport.CheckOptions(parser, args, paths, palette, 'Scratch 2 Resolve')
+	if xmls is None:
+		return
+	grades = not args.no_grade
+	delete_replaced = args.delete_replaced
+
+	options = {
+		'batch': not args.per_clip,
+		'sync': args.sync,
+		'collapse': not args.no_collapse,
+		'preflight': args.preflight,
+		'bins': args.bins,
+		'timeline': args.timeline,
+	}
+
+	if args.profile:
+		ScratchProfile.Enable()
+
+	try:
+		if args.plan or args.apply is not None:
+			if args.apply:
+				try:
+					plan = ScratchPlan.Load(args.apply, 'Resolve')
+				except (OSError, ValueError) as error:
+					log.error('[Plan] ' + str(error))
+					return
+			else:
+				plan = PlanXML(xmls[0], ScratchImport.PlanOptions(args, bins=args.bins, timeline=args.timeline), options['collapse'], options['preflight'], args.bins, args.timeline)
+			if args.plan:
+				plan.Save(args.plan)
+			if args.apply is not None:
+				if Connect():
+					mClipData = ImportXML(plan)
+				else:
+					log.error('[Scratch 2 Resolve] Could not connect to the active Resolve session')
+			log.info('[Done]')
+			return
+		elif args.watch:
+			# Each XML file connects to Resolve when it is imported, so the daemon can be started before Resolve
+			Watch(xmls, args.watch_folder, pipeline=args.pipeline, **options)
+			return
+		elif len(xmls) > 1:
+			if Connect():
+				# Every XML file is imported over the same Resolve connection
+				mClipData = ImportXML(xmls, **options)
+			else:
+				log.error('[Scratch 2 Resolve] Could not connect to the active Resolve session')
+			log.info('[Done]')
+			return
+
+		xml = xmls[0] if xmls else None
+		if ScratchWatch.DaemonRunning(os.path.dirname(os.path.abspath(xml)), WATCH_LOCK):
+			log.info('[Scratch 2 Resolve] The XML file will be imported by the running watch folder daemon')
+		elif xml:
+			if Connect():
+				mClipData = ImportXML(xml, pipeline=args.pipeline, **options)
+			else:
+				log.error('[Scratch 2 Resolve] Could not connect to the active Resolve session')
 		else:
-			print('[Scratch 2 Resolve] Could not connect to the active Resolve session')
-	else:
-		print('[Scratch 2 Resolve] XML filepath is invalid')
-	print('[Done]')
+			log.error('[Scratch 2 Resolve] XML filepath is invalid')
+		log.info('[Done]')
+	finally:
+		if args.profile:
+			ScratchProfile.PrintSummary()
+			ScratchProfile.Save(args.profile)
 
 if __name__ == '__main__':
 	Main()
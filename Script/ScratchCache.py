@@ -0,0 +1,228 @@
+'''
+Scratch Cache
+On-disk cache of parsed Scratch XML documents for the Scratch2Fusion and Scratch2Resolve scripts.
+
+Scratch writes the same cmd-0.xml again and again during a session, and large exports are often imported into several comps and a Resolve project. The parsed Project and Shot records of each document are saved in the "ScratchCache" folder below the temp_path of the Scratch project, keyed by the SHA-1 hash of the file contents and the parser version, so a repeat import skips the XML parsing.
+
+The records are written in a compact binary format that is read back with mmap: a header, the project record, a fixed size struct per shot, and a table of the unique strings that the records point to. When the cache folder grows past its size cap (256 MB, or the SCRATCH_CACHE_MB environment variable) the least recently used files are removed. A cap of 0 turns the cache off.
+'''
+
+import os, struct, mmap, math, tempfile
+from array import array
+
+import ScratchXML, ScratchProfile, ScratchGrade
+from ScratchLog import log
+
+# Bump when the file layout changes
+FORMAT_VERSION = 2
+MAGIC = b'SCXC'
+
+CACHE_FOLDER = 'ScratchCache'
+CACHE_EXTENSION = '.scx'
+
+# The size cap in MB is read from the environment, so the worker processes that parse several files use it as well
+CACHE_ENV = 'SCRATCH_CACHE_MB'
+DEFAULT_CACHE_MB = 256
+
+# magic, format version, parser version, shot count, string count
+HEADER = struct.Struct('<4sHHII')
+
+# Strings are stored as indexes into the string table, and NO_STRING stands for None.
+# Missing ints are stored as NO_INT and missing floats as NaN.
+NO_STRING = 0xFFFFFFFF
+NO_INT = -0x80000000
+
+# The Project record: 9 strings, the output width and height, and the output frame rate
+PROJECT_STRINGS = ('datetime', 'version', 'name', 'project_path', 'media_path', 'temp_path', 'watch_folder', 'group_name', 'construct_name')
+PROJECT_INTS = ('width', 'height')
+PROJECT_FLOATS = ('fps',)
+PROJECT = struct.Struct('<9I2id')
+
+# The Shot record: 7 strings, 10 ints, 2 floats, the 4 timecode fields, and the grade (NaN when the shot is not graded)
+SHOT_STRINGS = ('uuid', 'type', 'frame_file', 'file', 'name', 'reel_id', 'note')
+SHOT_INTS = ('slot', 'slot_len', 'layer', 'frame_no', 'frame_in', 'frame_out', 'length', 'width', 'height', 'note_color')
+SHOT_FLOATS = ('aspect', 'fps')
+SHOT = struct.Struct('<7I10i2d4i' + str(ScratchGrade.GRADE_SIZE) + 'd')
+NO_GRADE = (math.nan,) * ScratchGrade.GRADE_SIZE
+
+def MaxBytes():
+	try:
+		return max(0, int(float(os.environ.get(CACHE_ENV, DEFAULT_CACHE_MB)) * 1024 * 1024))
+	except ValueError:
+		return DEFAULT_CACHE_MB * 1024 * 1024
+
+def CacheFolder(project):
+	# The cache lives in the Scratch temp folder, or in the system temp folder when that is not available
+	temp_path = project.temp_path if project else None
+	if not temp_path or not os.path.isdir(temp_path):
+		temp_path = tempfile.gettempdir()
+	return os.path.join(temp_path, CACHE_FOLDER)
+
+def CachePath(xml):
+	name = ScratchXML.FileHash(xml) + '.v' + str(ScratchXML.PARSER_VERSION) + CACHE_EXTENSION
+	return os.path.join(CacheFolder(ScratchXML.ReadProject(xml)), name)
+
+class StringTable:
+	def __init__(self):
+		self.index = {}
+		self.strings = []
+
+	def Add(self, value):
+		if value is None:
+			return NO_STRING
+		position = self.index.get(value)
+		if position is None:
+			position = self.index[value] = len(self.strings)
+			self.strings.append(value)
+		return position
+
+	def Pack(self):
+		blobs = [value.encode('utf-8') for value in self.strings]
+		offsets = [0]
+		for blob in blobs:
+			offsets.append(offsets[-1] + len(blob))
+		return struct.pack('<' + str(len(offsets)) + 'I', *offsets) + b''.join(blobs)
+
+def PackInt(value):
+	return NO_INT if value is None else int(value)
+
+def PackFloat(value):
+	return math.nan if value is None else float(value)
+
+def UnpackInt(value):
+	return None if value == NO_INT else value
+
+def UnpackFloat(value):
+	return None if math.isnan(value) else value
+
+def Save(cache_path, project, shots):
+	strings = StringTable()
+	records = [PROJECT.pack(
+		*[strings.Add(getattr(project, name)) for name in PROJECT_STRINGS],
+		*[PackInt(getattr(project, name)) for name in PROJECT_INTS],
+		*[PackFloat(getattr(project, name)) for name in PROJECT_FLOATS])]
+	for shot in shots:
+		timecode = shot.timecode or (None, None, None, None)
+		grade = shot.grade or NO_GRADE
+		records.append(SHOT.pack(
+			*[strings.Add(getattr(shot, name)) for name in SHOT_STRINGS],
+			*[PackInt(getattr(shot, name)) for name in SHOT_INTS],
+			*[PackFloat(getattr(shot, name)) for name in SHOT_FLOATS],
+			*[PackInt(field) for field in timecode],
+			*grade))
+
+	data = HEADER.pack(MAGIC, FORMAT_VERSION, ScratchXML.PARSER_VERSION, len(shots), len(strings.strings)) + b''.join(records) + strings.Pack()
+
+	# Write to a temporary file first, so another import never reads a partly written file
+	os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+	temp_path = cache_path + '.' + str(os.getpid()) + '.tmp'
+	with open(temp_path, 'wb') as cache_file:
+		cache_file.write(data)
+	os.replace(temp_path, cache_path)
+
+def Load(cache_path):
+	# Returns (project, shots), or None when the file is missing or was written by another version
+	try:
+		with open(cache_path, 'rb') as cache_file, mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			magic, format_version, parser_version, shot_count, string_count = HEADER.unpack_from(data, 0)
+			if magic != MAGIC or format_version != FORMAT_VERSION or parser_version != ScratchXML.PARSER_VERSION:
+				return None
+
+			shots_start = HEADER.size + PROJECT.size
+			table_start = shots_start + shot_count * SHOT.size
+			blob_start = table_start + (string_count + 1) * 4
+			offsets = struct.unpack_from('<' + str(string_count + 1) + 'I', data, table_start)
+			strings = [data[blob_start + offsets[index]:blob_start + offsets[index + 1]].decode('utf-8') for index in range(string_count)]
+
+			values = PROJECT.unpack_from(data, HEADER.size)
+			project = ScratchXML.Project()
+			for name, value in zip(PROJECT_STRINGS, values):
+				setattr(project, name, None if value == NO_STRING else strings[value])
+			for name, value in zip(PROJECT_INTS, values[len(PROJECT_STRINGS):]):
+				setattr(project, name, UnpackInt(value))
+			project.fps = UnpackFloat(values[-1])
+
+			shots = []
+			first_int = len(SHOT_STRINGS)
+			first_float = first_int + len(SHOT_INTS)
+			first_timecode = first_float + len(SHOT_FLOATS)
+			first_grade = first_timecode + 4
+			for values in SHOT.iter_unpack(data[shots_start:table_start]):
+				shot = ScratchXML.Shot()
+				for name, value in zip(SHOT_STRINGS, values):
+					setattr(shot, name, None if value == NO_STRING else strings[value])
+				for name, value in zip(SHOT_INTS, values[first_int:first_float]):
+					setattr(shot, name, UnpackInt(value))
+				for name, value in zip(SHOT_FLOATS, values[first_float:first_timecode]):
+					setattr(shot, name, UnpackFloat(value))
+				timecode = values[first_timecode:first_grade]
+				shot.timecode = None if timecode[0] == NO_INT else timecode
+				grade = values[first_grade:]
+				shot.grade = None if math.isnan(grade[0]) else array('d', grade)
+				shot.note_color = ScratchXML.Color(shot.note_color)
+				shots.append(shot)
+			return project, shots
+	except (OSError, ValueError, IndexError, struct.error, UnicodeDecodeError):
+		return None
+
+def Evict(folder, max_bytes):
+	# Remove the least recently used files until the folder fits in max_bytes
+	entries = []
+	for name in os.listdir(folder):
+		if name.endswith(CACHE_EXTENSION):
+			try:
+				stat = os.stat(os.path.join(folder, name))
+			except OSError:
+				continue
+			entries.append((stat.st_mtime, stat.st_size, name))
+	total = sum(size for mtime, size, name in entries)
+	for mtime, size, name in sorted(entries):
+		if total <= max_bytes:
+			break
+		try:
+			os.remove(os.path.join(folder, name))
+			total -= size
+		except OSError:
+			pass
+
+def ReadShots(xml, project):
+	# ScratchXML.ReadShots() with the cache. The project record is filled in the same way.
+	max_bytes = MaxBytes()
+	if not max_bytes:
+		return ScratchXML.ReadShots(xml, project)
+
+	cache_path = None
+	with ScratchProfile.Stage('Read Cache'):
+		try:
+			cache_path = CachePath(xml)
+		except (OSError, KeyError, SyntaxError):
+			# Let the XML reader report the problem
+			pass
+		cached = Load(cache_path) if cache_path else None
+	if cached:
+		cached_project, shots = cached
+		for name in ScratchXML.Project.__slots__:
+			setattr(project, name, getattr(cached_project, name))
+		try:
+			# Mark the file as recently used
+			os.utime(cache_path)
+		except OSError:
+			pass
+		log.debug('[Cache] ' + xml + ' read from ' + cache_path)
+		return shots
+
+	shots = ScratchXML.ReadShots(xml, project)
+	if cache_path:
+		with ScratchProfile.Stage('Write Cache'):
+			try:
+				Save(cache_path, project, shots)
+				Evict(os.path.dirname(cache_path), max_bytes)
+			except (OSError, struct.error) as error:
+				log.debug('[Cache] ' + xml + ' could not be cached: ' + str(error))
+	return shots
+
+def ParseXML(xml):
+	# ScratchXML.ParseXML() with the cache, for ScratchXML.ParseXMLs()
+	project = ScratchXML.Project()
+	shots = ReadShots(xml, project)
+	return project, shots
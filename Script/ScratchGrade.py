@@ -0,0 +1,69 @@
+'''
+Scratch Grade
+Primary color grades of Scratch shots for the Scratch2Fusion and Scratch2Resolve scripts.
+
+ScratchXML.ParseShot() reads the <colorgrade> block of each shot along with the rest of the shot into a flat array of ten doubles: the lift, gamma, and gain of the red, green, and blue channels, followed by the saturation. Grades that leave the image unchanged are dropped, so only the graded shots get a ColorCorrector node in Fusion or a CDL in Resolve. The ASC CDL slope, offset, and power values that Resolve uses are worked out from the array with a few arithmetic operations per shot.
+'''
+
+from array import array
+
+# The position of each control in a grade array
+LIFT = 0
+GAMMA = 3
+GAIN = 6
+SATURATION = 9
+GRADE_SIZE = 10
+
+IDENTITY = array('d', (0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0))
+
+# Grades closer than this to IDENTITY count as ungraded
+TOLERANCE = 1e-6
+
+# The smallest gamma and power values, so a zero in the XML does not divide by zero
+MIN_GAMMA = 1e-3
+
+# The Fusion ColorCorrector inputs of each grade value
+FUSION_INPUTS = (
+	'MasterRedLift', 'MasterGreenLift', 'MasterBlueLift',
+	'MasterRedGamma', 'MasterGreenGamma', 'MasterBlueGamma',
+	'MasterRedGain', 'MasterGreenGain', 'MasterBlueGain',
+	'MasterSaturation',
+)
+
+def Grade(lift, gamma, gain, saturation):
+	# A grade array from (r, g, b) lift, gamma, and gain values and the saturation
+	return array('d', (*lift, *gamma, *gain, saturation))
+
+def FromCDL(slope, offset, power, saturation):
+	# A grade array from ASC CDL values, for exports that store the grade that way
+	lift = offset
+	gain = [slope[channel] + offset[channel] for channel in range(3)]
+	gamma = [1.0 / max(value, MIN_GAMMA) for value in power]
+	return Grade(lift, gamma, gain, saturation)
+
+def IsIdentity(grade):
+	return all(abs(value - neutral) <= TOLERANCE for value, neutral in zip(grade, IDENTITY))
+
+def CDL(grade):
+	# The (slope, offset, power, saturation) of a grade, where slope, offset, and power are (r, g, b) tuples
+	lift = grade[LIFT:GAMMA]
+	gamma = grade[GAMMA:GAIN]
+	gain = grade[GAIN:SATURATION]
+	slope = tuple(gain[channel] - lift[channel] for channel in range(3))
+	power = tuple(1.0 / max(value, MIN_GAMMA) for value in gamma)
+	return slope, tuple(lift), power, grade[SATURATION]
+
+def ResolveCDL(grade, node_index=1):
+	# The table that TimelineItem.SetCDL() takes, with the values written as text
+	slope, offset, power, saturation = CDL(grade)
+	return {
+		'NodeIndex': str(node_index),
+		'Slope': ' '.join('%.6g' % value for value in slope),
+		'Offset': ' '.join('%.6g' % value for value in offset),
+		'Power': ' '.join('%.6g' % value for value in power),
+		'Saturation': '%.6g' % saturation,
+	}
+
+def FusionInputs(grade):
+	# The ColorCorrector input values of a grade
+	return dict(zip(FUSION_INPUTS, grade))
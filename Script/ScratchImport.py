@@ -0,0 +1,117 @@
+'''
+Scratch Import
+Import steps shared by the Scratch2Fusion and Scratch2Resolve scripts.
+
+Both scripts read the same Scratch XML documents and accept the same core options, so the host independent parts of an import live here: preparing the parsed shots (path mapping, grades, collapsing image sequences, and the media preflight), the plan cache options, the --watch folder daemon, and the checks made on the command line options before connecting to the host application. Each script only keeps the steps that talk to Fusion or Resolve.
+'''
+
+import os
+
+import ScratchXML, ScratchSequence, ScratchPreflight, ScratchProfile, ScratchCache, ScratchWatch
+from ScratchLog import log
+
+def PrepareShots(project, shots, paths, collapse=True, preflight=False, grades=True, by_grade=False):
+	# Apply the PathMaps and the --path-map remaps to the media paths. The frame_file names the same media and is used
+	# for the first frame of an image sequence, so it is mapped as well.
+	with ScratchProfile.Stage('Map Paths'):
+		paths.SetProject(project)
+		for shot in shots:
+			shot.file = paths.Map(shot.file)
+			shot.frame_file = paths.Map(shot.frame_file)
+			if not grades:
+				shot.grade = None
+			log.debug('[Shot] ' + shot.name + ' ' + shot.file)
+
+	if collapse:
+		# Use a single Loader node or media pool item for the shots that share an image sequence
+		with ScratchProfile.Stage('Collapse Sequences'):
+			shots = ScratchSequence.Collapse(shots, by_grade)
+
+	if preflight:
+		# Drop the clips with missing media before the host application is asked to load them
+		with ScratchProfile.Stage('Preflight'):
+			shots = ScratchPreflight.Preflight(shots)
+	return shots
+
+def PlanOptions(args, **host_options):
+	# The options that change a compiled plan, which are part of its cache key
+	options = {
+		'collapse': not args.no_collapse,
+		'path_map': args.path_map,
+		'palette': ScratchXML.FileHash(args.palette) if args.palette else None,
+		'grade': not args.no_grade,
+	}
+	options.update(host_options)
+	return options
+
+def Watch(xmls, folders, lock_name, reconnect, import_xml, title, connect_error):
+	# Import the given XML files, then every new cmd-*.xml file written to the watch folders. reconnect() picks up the
+	# current comp or project and returns a false value when the host can not be reached, and import_xml() imports one
+	# file and returns its Project record.
+	if not folders and xmls:
+		folders = [os.path.dirname(os.path.abspath(xmls[0]))]
+	watcher = ScratchWatch.WatchFolder(folders, lock_name)
+
+	def ImportWatched(xml):
+		# Scratch may still be writing the file, or it may be truncated. Validate() checks that it ends with the closing
+		# root tag, and the next write of the file imports it again.
+		try:
+			ScratchXML.Validate(xml)
+		except ValueError as error:
+			log.error('[XML Document] [Error] ' + str(error))
+			return
+		if reconnect():
+			project = import_xml(xml)
+			# Also watch the folder named in the Scratch project
+			watcher.AddFolder(project.watch_folder)
+		else:
+			log.error('[' + title + '] ' + connect_error)
+		log.info('[Done]')
+
+	for xml in xmls:
+		ImportWatched(xml)
+	if watcher.folders:
+		watcher.Run(ImportWatched)
+	else:
+		log.error('[' + title + '] There is no watch folder to monitor')
+
+def FlagList(flags):
+	if len(flags) == 1:
+		return flags[0]
+	return ', '.join(flags[:-1]) + ', or ' + flags[-1]
+
+def CheckOptions(parser, args, paths, palette, title, plan_conflicts=None):
+	# Check the shared command line options and apply the cache, --path-map, and --palette settings. plan_conflicts
+	# maps the host specific flags that can not be used with --plan or --apply to their values. Returns the expanded
+	# and validated XML files, or None when none of the given files can be imported.
+	xmls = ScratchXML.ExpandPaths(args.xml_path)
+	if not xmls and not args.watch and not args.apply:
+		parser.error('the following arguments are required: xml_path')
+	if args.plan or args.apply is not None:
+		conflicts = dict({'--watch': args.watch}, **(plan_conflicts or {}))
+		if len(xmls) > 1 or any(conflicts.values()):
+			parser.error('--plan and --apply take a single XML file, and can not be combined with ' + FlagList(list(conflicts)))
+	if args.plan and args.apply:
+		parser.error('--plan compiles the XML file, so --apply can not be given a plan file as well')
+	if args.cache_size is not None:
+		if args.cache_size < 0:
+			parser.error('the --cache-size has to be 0 or more')
+		# Set in the environment so the worker processes that parse several XML files use it as well
+		os.environ[ScratchCache.CACHE_ENV] = str(args.cache_size)
+	if args.pipeline is not None and args.pipeline < 1:
+		parser.error('the --pipeline chunk size has to be at least 1')
+
+	try:
+		paths.AddRemaps(args.path_map)
+		if args.palette:
+			palette.Load(args.palette)
+	except (OSError, ValueError) as error:
+		parser.error(str(error))
+
+	if xmls and not args.watch:
+		# Check the XML files before connecting, so a bad file does not wait on the host application
+		xmls = ScratchXML.ValidXMLs(xmls)
+		if not xmls:
+			log.error('[' + title + '] XML filepath is invalid')
+			return None
+	return xmls
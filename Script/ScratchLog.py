@@ -0,0 +1,81 @@
+'''
+Scratch Log
+Leveled logging for the Scratch2Fusion and Scratch2Resolve scripts.
+
+Messages are written to the terminal at the chosen verbosity and, optionally, to a rotating log file. The messages meant for the Fusion console are kept in memory and sent as a single block at the end of each import, so the per-clip messages never cost a call to the host application.
+'''
+
+import logging
+
+# The logger shared by the scripts and their helper modules
+log = logging.getLogger('Scratch')
+
+# Rotating log file size and the number of old log files that are kept
+LOG_FILE_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+class ConsoleBuffer(logging.Handler):
+	# Holds messages in memory until Flush() sends them to the host application console
+	def __init__(self, level):
+		logging.Handler.__init__(self, level)
+		self.lines = []
+
+	def emit(self, record):
+		self.lines.append(self.format(record))
+
+_buffer = None
+
+def Level(verbosity):
+	# -1 and below: warnings only, 0: progress messages, 1 and above: per-clip details
+	if verbosity < 0:
+		return logging.WARNING
+	if verbosity == 0:
+		return logging.INFO
+	return logging.DEBUG
+
+def Setup(verbosity=0, log_file=None):
+	global _buffer
+	level = Level(verbosity)
+
+	for handler in list(log.handlers):
+		log.removeHandler(handler)
+	log.propagate = False
+
+	terminal = logging.StreamHandler()
+	terminal.setLevel(level)
+	terminal.setFormatter(logging.Formatter('%(message)s'))
+	log.addHandler(terminal)
+
+	_buffer = ConsoleBuffer(level)
+	_buffer.setFormatter(logging.Formatter('%(message)s'))
+	log.addHandler(_buffer)
+
+	log.setLevel(level)
+	if log_file:
+		# The log file always gets the per-clip details
+		from logging.handlers import RotatingFileHandler
+		rotating = RotatingFileHandler(log_file, maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding='utf-8')
+		rotating.setLevel(logging.DEBUG)
+		rotating.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(message)s'))
+		log.addHandler(rotating)
+		log.setLevel(logging.DEBUG)
+
+def Flush(printer=None):
+	# Send the buffered messages to the host console with one call, e.g. Flush(comp.Print)
+	if _buffer is None or not _buffer.lines:
+		return
+	lines = _buffer.lines
+	_buffer.lines = []
+	if printer:
+		printer('\n'.join(lines) + '\n')
+
+def Summary(results, target_label, source_label='XML files'):
+	# Log one line per XML document (or other source) and the totals. Each result is (xml, target, shot count, error).
+	failed = [result for result in results if result[3] is not None]
+	shot_count = sum(result[2] for result in results)
+	log.info('[Summary] ' + str(len(results)) + ' ' + source_label + ', ' + str(shot_count) + ' shots imported, ' + str(len(failed)) + ' failed')
+	for xml, target, count, error in results:
+		if error is not None:
+			log.error('  ' + xml + ' [Error] ' + str(error))
+		else:
+			log.info('  ' + xml + ' -> ' + target_label + ' "' + target + '" (' + str(count) + ' shots)')
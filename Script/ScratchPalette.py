@@ -0,0 +1,104 @@
+'''
+Scratch Palette
+Note color mapping for the Scratch2Fusion and Scratch2Resolve scripts.
+
+Each Scratch note status is mapped to a Fusion TileColor table and a Resolve clip color name. The palette is built once per run, so every shot with the same status shares the same color objects and no color work is done per clip. A facility can override any of the entries with a JSON file passed to the --palette option:
+
+{
+	"red": {"fusion": [0.84, 0.27, 0.23], "resolve": "Orange"},
+	"none": {"fusion": {"R": 0.5, "G": 0.5, "B": 0.5}, "resolve": "Tan"},
+	"12": {"fusion": [1.0, 1.0, 1.0], "resolve": "Beige"}
+}
+
+Entries are named by the Scratch status number or NoteColor name. "none" is used for shots without a note, and "default" for status values that have no entry.
+'''
+
+import json
+
+from ScratchXML import NoteColor
+from ScratchLog import log
+
+# The built-in palette: (Fusion R, G, B), Resolve clip color
+DEFAULT_PALETTE = {
+	'none': ((0.474509803921569, 0.658823529411765, 0.815686274509804), 'Blue'),
+	'default': ((0.474509803921569, 0.658823529411765, 0.815686274509804), 'Blue'),
+	NoteColor.YELLOW: ((0.886274509803922, 0.662745098039216, 0.109803921568627), 'Yellow'),
+	# Resolve has no red clip color
+	NoteColor.RED: ((0.843137254901961, 0.266666666666667, 0.227450980392157), 'Pink'),
+	NoteColor.GREEN: ((0.266666666666667, 0.56078431372549, 0.396078431372549), 'Green'),
+	NoteColor.BLUE: ((0.474509803921569, 0.658823529411765, 0.815686274509804), 'Blue'),
+	NoteColor.PURPLE: ((0.6, 0.450980392156863, 0.627450980392157), 'Violet'),
+	NoteColor.ORANGE: ((0.92156862745098, 0.431372549019608, 0), 'Orange'),
+	NoteColor.CYAN: ((0, 0.596078431372549, 0.6), 'Teal'),
+	NoteColor.PINK: ((0.913725490196078, 0.549019607843137, 0.709803921568627), 'Pink'),
+	NoteColor.BLACK: ((0.549019607843137, 0.352941176470588, 0.247058823529412), 'Chocolate'),
+	NoteColor.WHITE: ((0.725490196078431, 0.690196078431373, 0.592156862745098), 'Tan'),
+}
+
+def TileColor(rgb):
+	# A Fusion TileColor table
+	if isinstance(rgb, dict):
+		return {'R': float(rgb['R']), 'G': float(rgb['G']), 'B': float(rgb['B'])}
+	red, green, blue = rgb
+	return {'R': float(red), 'G': float(green), 'B': float(blue)}
+
+def Key(name):
+	# Palette entries are stored by status number, or as 'none' and 'default'
+	if isinstance(name, int):
+		return name
+	name = str(name).strip().lower()
+	if name in ('none', 'default'):
+		return name
+	if name.isdigit():
+		return int(name)
+	if name.upper() in NoteColor.__members__:
+		return NoteColor[name.upper()]
+	raise ValueError('Unknown palette entry: ' + name)
+
+class Palette:
+	def __init__(self):
+		self.tile_colors = {}
+		self.clip_colors = {}
+		self.unknown = set()
+		for name, (rgb, clip_color) in DEFAULT_PALETTE.items():
+			self.Set(name, rgb, clip_color)
+
+	def Set(self, name, rgb=None, clip_color=None):
+		key = Key(name)
+		if rgb is not None:
+			self.tile_colors[key] = TileColor(rgb)
+		if clip_color is not None:
+			self.clip_colors[key] = str(clip_color)
+		# A new status without a color for one of the hosts uses the default color there
+		self.tile_colors.setdefault(key, self.tile_colors.get('default'))
+		self.clip_colors.setdefault(key, self.clip_colors.get('default'))
+
+	def Load(self, json_path):
+		with open(json_path, 'r', encoding='utf-8') as json_file:
+			table = json.load(json_file)
+		if not isinstance(table, dict):
+			raise ValueError('The palette file has to hold a JSON object: ' + json_path)
+		for name, entry in table.items():
+			try:
+				self.Set(name, entry.get('fusion'), entry.get('resolve'))
+			except (AttributeError, KeyError, TypeError, ValueError) as error:
+				raise ValueError('Invalid palette entry "' + name + '" in ' + json_path + ': ' + str(error))
+
+	def Lookup(self, colors, note_color):
+		if note_color is None:
+			return colors['none']
+		color = colors.get(note_color)
+		if color is None:
+			if note_color not in self.unknown:
+				self.unknown.add(note_color)
+				log.warning('[Palette] Note status ' + str(int(note_color)) + ' has no palette entry, the default color is used')
+			return colors['default']
+		return color
+
+	def TileColor(self, note_color):
+		# The shared Fusion TileColor table for a note status
+		return self.Lookup(self.tile_colors, note_color)
+
+	def ClipColor(self, note_color):
+		# The Resolve clip color name for a note status
+		return self.Lookup(self.clip_colors, note_color)
@@ -0,0 +1,154 @@
+'''
+Scratch PathMap
+Local path mapping for the Scratch2Fusion and Scratch2Resolve scripts.
+
+The Fusion PathMap tables (the global preferences and the comp preferences) are read once when the script connects, and the --path-map remaps are added on top of them. Every clip path is then resolved in Python with a prefix tree of path components, and the result is cached per folder, so mapping the media paths does not cost a comp.MapPath() call per clip.
+'''
+
+import re
+
+# A --path-map source that stands for the media_path attribute of the Scratch project
+MEDIA_PATH = 'media_path'
+
+# Fusion PathMap names such as "Footage:" or "Comp:". Single letter names are Windows drive letters.
+PATHMAP_NAME = re.compile(r'^([A-Za-z][\w .-]+:)(?!//)(.*)$')
+
+# Stops a remap whose target contains its own source from being applied forever
+MAX_DEPTH = 8
+
+def Components(path):
+	# Split a path into (head, [folder names]). The head is "/", "//", a drive letter, or a PathMap name.
+	path = path.replace('\\', '/')
+	match = PATHMAP_NAME.match(path)
+	if match:
+		head, rest = match.group(1), match.group(2)
+	elif path.startswith('//'):
+		head, rest = '//', path[2:]
+	elif path.startswith('/'):
+		head, rest = '/', path[1:]
+	elif len(path) > 1 and path[1] == ':':
+		head, rest = path[0:2], path[2:]
+	else:
+		head, rest = '', path
+	return head, [name for name in rest.split('/') if name]
+
+def Key(head):
+	# Drive letters and PathMap names are not case sensitive
+	if head.endswith(':'):
+		return head.lower()
+	return head
+
+def Join(head, names):
+	rest = '/'.join(names)
+	if not head:
+		return rest
+	if head.endswith(':') and len(head) > 2:
+		# PathMap names are written without a slash, as in "Footage:shot/shot.0001.exr"
+		return head + rest
+	if head.endswith('/'):
+		return head + rest
+	return head + '/' + rest
+
+class PathMap:
+	def __init__(self, remaps=None):
+		# Each table maps a source prefix to its target. The user remaps win over the Fusion PathMaps.
+		self.host_maps = {}
+		self.user_maps = {}
+		self.project_maps = {}
+		self.project = None
+		self.tree = {}
+		self.cache = {}
+		self.AddRemaps(remaps or [])
+
+	def AddRemaps(self, remaps):
+		# Remaps are "SRC=DST" strings from the --path-map option
+		for remap in remaps:
+			src, sep, dst = remap.partition('=')
+			if not sep or not src:
+				raise ValueError('A path remap has to use the SRC=DST form: ' + remap)
+			self.user_maps[src] = dst
+		self.Build()
+
+	def SetHostMaps(self, *tables):
+		# The Fusion PathMap tables, from fu.GetPrefs('Global.Paths.Map') and comp.GetPrefs('Comp.Paths.Map'). Later tables win.
+		self.host_maps = {}
+		for table in tables:
+			for src, dst in (table or {}).items():
+				# A PathMap can list several folders, and Fusion resolves new paths to the first one
+				dst = str(dst).split(';')[0]
+				if dst:
+					self.host_maps[src] = dst
+		self.Build()
+
+	def SetProject(self, project):
+		# Expand the media_path remap with the media folder of the Scratch project
+		media_path = project.media_path if project else None
+		if media_path == self.project:
+			return
+		self.project = media_path
+		self.project_maps = {}
+		if media_path and MEDIA_PATH in self.user_maps:
+			self.project_maps[media_path] = self.user_maps[MEDIA_PATH]
+		self.Build()
+
+	def Build(self):
+		self.tree = {}
+		self.cache = {}
+		for table in (self.host_maps, self.project_maps, self.user_maps):
+			for src, dst in table.items():
+				if src == MEDIA_PATH:
+					continue
+				head, names = Components(src)
+				node = self.tree.setdefault(Key(head), {})
+				for name in names:
+					node = node.setdefault(name, {})
+				node[None] = dst
+
+	def Lookup(self, folder):
+		# Find the longest source prefix of the folder and return the remapped folder, or None
+		head, names = Components(folder)
+		node = self.tree.get(Key(head))
+		if node is None:
+			return None
+		match = None
+		if None in node:
+			match = (node[None], 0)
+		for index, name in enumerate(names):
+			node = node.get(name)
+			if node is None:
+				break
+			if None in node:
+				match = (node[None], index + 1)
+		if match is None:
+			return None
+		target, used = match
+		target_head, target_names = Components(target)
+		return Join(target_head, target_names + names[used:])
+
+	def MapFolder(self, folder):
+		mapped = self.cache.get(folder)
+		if mapped is None:
+			mapped = folder
+			for depth in range(MAX_DEPTH):
+				remapped = self.Lookup(mapped)
+				if remapped is None or remapped == mapped:
+					break
+				mapped = remapped
+			self.cache[folder] = mapped
+		return mapped
+
+	def Map(self, path):
+		# The local replacement for comp.MapPath(). Paths that do not match a PathMap are returned unchanged.
+		if not path or not self.tree:
+			return path
+		folder, sep, name = path.replace('\\', '/').rpartition('/')
+		if not sep:
+			# A bare PathMap name such as "Temp:shot.exr"
+			head, names = Components(path)
+			if not names:
+				return self.MapFolder(path)
+			folder, name = Join(head, names[:-1]), names[-1]
+		mapped = self.MapFolder(folder)
+		if mapped == folder:
+			return path
+		return mapped.rstrip('/') + '/' + name if mapped else name
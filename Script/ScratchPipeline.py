@@ -0,0 +1,84 @@
+'''
+Scratch Pipeline
+Overlaps the XML parsing with the host application calls for the Scratch2Fusion and Scratch2Resolve scripts.
+
+A parser thread streams the shots of a Scratch XML document, prepares them a chunk at a time, and hands the chunks to the thread that talks to Fusion or Resolve through a bounded queue. The queue only holds a few chunks, so the parser waits whenever the host falls behind and memory use stays flat on large selections. An error on either side stops the other one, and the error is raised in the thread that reads the chunks.
+'''
+
+import queue, threading
+
+import ScratchXML
+
+# Shots per chunk, and the number of chunks that can wait in the queue
+CHUNK_SIZE = 200
+QUEUE_CHUNKS = 4
+
+# How often a blocked parser thread checks if the import was stopped
+POLL_SECONDS = 0.1
+
+# Queued after the last chunk
+_DONE = object()
+
+def Chunks(items, size):
+	chunk = []
+	for item in items:
+		chunk.append(item)
+		if len(chunk) >= size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def ShotChunks(xml, project, prepare, chunk_size=CHUNK_SIZE):
+	# Runs on the parser thread. Yields (parsed shots, prepared shots) for each chunk of the selection, where
+	# prepare() does the path mapping, collapsing, and preflight work of the script on the parsed chunk.
+	shots = (ScratchXML.ParseShot(elem) for elem in ScratchXML.IterShots(xml, project))
+	for parsed in Chunks(shots, chunk_size):
+		yield parsed, prepare(list(parsed))
+
+class Pipeline:
+	# Iterate over a Pipeline to receive the chunks of a producer iterator that runs on a thread of its own
+	def __init__(self, producer, queue_chunks=QUEUE_CHUNKS):
+		self.producer = producer
+		self.queue = queue.Queue(maxsize=queue_chunks)
+		self.stopped = threading.Event()
+		self.error = None
+
+	def Put(self, item):
+		# Wait for room in the queue, unless the reading side has stopped
+		while not self.stopped.is_set():
+			try:
+				self.queue.put(item, timeout=POLL_SECONDS)
+				return True
+			except queue.Full:
+				pass
+		return False
+
+	def Produce(self):
+		try:
+			for chunk in self.producer:
+				if not self.Put(chunk):
+					return
+		except BaseException as error:
+			self.error = error
+		finally:
+			self.Put(_DONE)
+
+	def Stop(self):
+		self.stopped.set()
+
+	def __iter__(self):
+		thread = threading.Thread(target=self.Produce, name='Scratch Parser', daemon=True)
+		thread.start()
+		try:
+			while True:
+				chunk = self.queue.get()
+				if chunk is _DONE:
+					break
+				yield chunk
+		finally:
+			# Also reached when the host side fails or is interrupted, which stops the parser at its next chunk
+			self.Stop()
+			thread.join()
+		if self.error is not None:
+			raise self.error
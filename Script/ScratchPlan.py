@@ -0,0 +1,139 @@
+'''
+Scratch Plan
+Two phase imports for the Scratch2Fusion and Scratch2Resolve scripts.
+
+An import is first compiled from the Scratch XML into a plan without connecting to the host application. The plan is a JSON document that lists the operations of the import, such as the Loader and Merge nodes to create with their settings, colors, and positions, or the media pool items to import and the timeline clips to place. Applying a plan reads the comp or media pool state once, compares it with the plan by Scratch shot uuid and hash, and only runs the operations that are still needed, in batches. A plan can be saved to review it or to apply it on another machine, and compiled plans are cached by the hash of the XML file, so applying the same cmd-0.xml again does not read it again.
+'''
+
+import os, json, hashlib, tempfile
+from array import array
+
+import ScratchXML
+from ScratchLog import log
+
+# Plans written by another version of the scripts are compiled again
+PLAN_VERSION = 2
+
+# Compiled plans are cached here, and the least recently used ones are removed past CACHE_FILES
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'ScratchPlans')
+CACHE_FILES = 64
+
+# The cached image sequence parts of a shot are rebuilt when needed, so they are not saved
+SKIP_FIELDS = ('sequence',)
+
+def ShotRecord(shot):
+	record = dict((name, getattr(shot, name)) for name in ScratchXML.Shot.__slots__ if name not in SKIP_FIELDS)
+	if shot.grade is not None:
+		record['grade'] = list(shot.grade)
+	return record
+
+def RecordShot(record):
+	shot = ScratchXML.Shot(**record)
+	if shot.timecode is not None:
+		shot.timecode = tuple(shot.timecode)
+	if shot.note_color is not None:
+		shot.note_color = ScratchXML.Color(shot.note_color)
+	if shot.grade is not None:
+		shot.grade = array('d', shot.grade)
+	return shot
+
+def ProjectRecord(project):
+	return dict((name, getattr(project, name)) for name in ScratchXML.Project.__slots__)
+
+class Plan:
+	def __init__(self, host, xml=None, project=None, options=None):
+		self.host = host
+		self.xml = xml
+		self.xml_hash = None
+		self.project = project or ScratchXML.Project()
+		# The compile options, which are also part of the cache key
+		self.options = options or {}
+		self.operations = []
+
+	def Add(self, op, **fields):
+		fields['op'] = op
+		self.operations.append(fields)
+
+	def Operations(self, op):
+		return [operation for operation in self.operations if operation['op'] == op]
+
+	def Record(self):
+		return {
+			'version': PLAN_VERSION,
+			'host': self.host,
+			'xml': self.xml,
+			'xml_hash': self.xml_hash,
+			'options': self.options,
+			'project': ProjectRecord(self.project),
+			'operations': self.operations,
+		}
+
+	def Save(self, plan_path):
+		with open(plan_path, 'w', encoding='utf-8') as plan_file:
+			json.dump(self.Record(), plan_file, indent='\t')
+		log.info('[Plan Written] ' + plan_path + ' (' + str(len(self.operations)) + ' operations)')
+
+def Load(plan_path, host):
+	# Read a saved plan. Raises ValueError when it can not be applied to this host.
+	with open(plan_path, 'r', encoding='utf-8') as plan_file:
+		try:
+			record = json.load(plan_file)
+		except json.JSONDecodeError as error:
+			raise ValueError(plan_path + ' is not a valid plan: ' + str(error))
+	if not isinstance(record, dict) or record.get('version') != PLAN_VERSION:
+		raise ValueError(plan_path + ' is not a version ' + str(PLAN_VERSION) + ' plan')
+	if record.get('host') != host:
+		raise ValueError(plan_path + ' is a plan for ' + str(record.get('host')) + ', not ' + host)
+
+	plan = Plan(host, record.get('xml'), ScratchXML.Project(**record.get('project', {})), record.get('options'))
+	plan.xml_hash = record.get('xml_hash')
+	plan.operations = record.get('operations', [])
+	return plan
+
+def CacheKey(host, xml_hash, options):
+	key = json.dumps([PLAN_VERSION, host, xml_hash, options], sort_keys=True)
+	return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def CachePath(key):
+	return os.path.join(CACHE_DIR, key + '.json')
+
+def Prune():
+	# Remove the least recently used plans
+	plan_paths = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith('.json')]
+	if len(plan_paths) <= CACHE_FILES:
+		return
+	plan_paths.sort(key=os.path.getmtime)
+	for plan_path in plan_paths[:-CACHE_FILES]:
+		try:
+			os.remove(plan_path)
+		except OSError:
+			pass
+
+def Compile(host, xml, options, compiler, cache=True):
+	# The plan of an XML document. compiler() builds a new Plan, and is only called when the cache has no plan
+	# for the same file contents and options.
+	xml_hash = ScratchXML.FileHash(xml)
+	key = CacheKey(host, xml_hash, options)
+	if cache:
+		try:
+			plan = Load(CachePath(key), host)
+			# Mark the plan as recently used
+			os.utime(CachePath(key))
+			plan.xml = xml
+			log.info('[Plan] Using the cached plan for ' + xml)
+			return plan
+		except (OSError, ValueError):
+			pass
+
+	plan = compiler()
+	plan.xml_hash = xml_hash
+	plan.options = options
+	if cache:
+		try:
+			os.makedirs(CACHE_DIR, exist_ok=True)
+			with open(CachePath(key), 'w', encoding='utf-8') as plan_file:
+				json.dump(plan.Record(), plan_file)
+			Prune()
+		except OSError as error:
+			log.warning('[Plan] The plan could not be cached: ' + str(error))
+	return plan
@@ -0,0 +1,206 @@
+'''
+Scratch Preflight
+Media checks for the Scratch2Fusion and Scratch2Resolve scripts that run before any host application call is made.
+
+Every clip is checked on a thread pool: the file (or the first and last frames of an image sequence) has to exist, and the DPX, EXR, and QuickTime headers are read to compare the resolution, frame rate, and frame count with the Scratch XML. Clips with missing media are dropped from the import and the other findings are reported as warnings.
+'''
+
+import os, struct, time
+from concurrent.futures import ThreadPoolExecutor
+
+import ScratchSequence
+from ScratchLog import log
+
+# Thread pool size used for the file checks. Most of the time is spent waiting on the file server.
+WORKERS = 16
+
+def ReadDPX(filepath):
+	with open(filepath, 'rb') as media:
+		header = media.read(2048)
+	if len(header) < 1944 or header[0:4] not in (b'SDPX', b'XPDS'):
+		return {}
+	endian = '>' if header[0:4] == b'SDPX' else '<'
+	info = {}
+	info['width'], info['height'] = struct.unpack_from(endian + 'II', header, 772)
+
+	# The frame rate is stored in the film header, or in the television header
+	for offset in (1724, 1940):
+		fps = struct.unpack_from(endian + 'f', header, offset)[0]
+		if 0 < fps < 1000:
+			info['fps'] = fps
+			break
+	return info
+
+def ReadEXR(filepath):
+	with open(filepath, 'rb') as media:
+		header = media.read(65536)
+	if header[0:4] != b'\x76\x2f\x31\x01':
+		return {}
+
+	info = {}
+	pos = 8
+	while pos < len(header):
+		end = header.find(b'\0', pos)
+		if end < 0 or end == pos:
+			break
+		name = header[pos:end]
+		type_end = header.find(b'\0', end + 1)
+		if type_end < 0 or type_end + 5 > len(header):
+			break
+		size = struct.unpack_from('<i', header, type_end + 1)[0]
+		value = type_end + 5
+
+		if name == b'displayWindow' and size == 16:
+			xMin, yMin, xMax, yMax = struct.unpack_from('<iiii', header, value)
+			info['width'] = xMax - xMin + 1
+			info['height'] = yMax - yMin + 1
+		elif name == b'framesPerSecond' and size == 8:
+			numerator, denominator = struct.unpack_from('<iI', header, value)
+			if denominator:
+				info['fps'] = numerator / denominator
+		pos = value + size
+	return info
+
+def Atoms(media, start, end):
+	# Walk the QuickTime atoms between two file offsets, yielding (type, content start, atom end)
+	pos = start
+	while pos + 8 <= end:
+		media.seek(pos)
+		header = media.read(8)
+		if len(header) < 8:
+			break
+		size, kind = struct.unpack('>I4s', header)
+		offset = 8
+		if size == 1:
+			size = struct.unpack('>Q', media.read(8))[0]
+			offset = 16
+		elif size == 0:
+			size = end - pos
+		if size < offset:
+			break
+		yield kind, pos + offset, pos + size
+		pos += size
+
+def FindAtom(media, start, end, kind):
+	for atom, content, atom_end in Atoms(media, start, end):
+		if atom == kind:
+			return content, atom_end
+	return None
+
+def ReadMOV(filepath):
+	with open(filepath, 'rb') as media:
+		moov = FindAtom(media, 0, os.fstat(media.fileno()).st_size, b'moov')
+		if not moov:
+			return {}
+
+		for atom, trak, trak_end in Atoms(media, moov[0], moov[1]):
+			if atom != b'trak':
+				continue
+			mdia = FindAtom(media, trak, trak_end, b'mdia')
+			if not mdia:
+				continue
+			hdlr = FindAtom(media, mdia[0], mdia[1], b'hdlr')
+			if not hdlr:
+				continue
+			media.seek(hdlr[0] + 8)
+			if media.read(4) != b'vide':
+				continue
+
+			info = {}
+			# The track size is stored as 16.16 fixed point numbers at the end of the track header
+			tkhd = FindAtom(media, trak, trak_end, b'tkhd')
+			if tkhd:
+				media.seek(tkhd[1] - 8)
+				width, height = struct.unpack('>II', media.read(8))
+				info['width'] = width >> 16
+				info['height'] = height >> 16
+
+			mdhd = FindAtom(media, mdia[0], mdia[1], b'mdhd')
+			stbl = None
+			minf = FindAtom(media, mdia[0], mdia[1], b'minf')
+			if minf:
+				stbl = FindAtom(media, minf[0], minf[1], b'stbl')
+			stts = FindAtom(media, stbl[0], stbl[1], b'stts') if stbl else None
+			if mdhd and stts:
+				media.seek(mdhd[0])
+				version = media.read(1)[0]
+				media.seek(mdhd[0] + (20 if version == 1 else 12))
+				timescale = struct.unpack('>I', media.read(4))[0]
+
+				media.seek(stts[0] + 4)
+				count = struct.unpack('>I', media.read(4))[0]
+				entries = media.read(8 * count)
+				frames = 0
+				for index in range(len(entries) // 8):
+					sample_count, sample_delta = struct.unpack_from('>II', entries, index * 8)
+					frames += sample_count
+					if index == 0 and sample_delta:
+						info['fps'] = timescale / sample_delta
+				info['frames'] = frames
+			return info
+	return {}
+
+# Header readers by file extension
+READERS = {
+	'dpx': ReadDPX,
+	'exr': ReadEXR,
+	'mov': ReadMOV,
+	'mp4': ReadMOV,
+	'm4v': ReadMOV,
+}
+
+def Probe(filepath):
+	reader = READERS.get(os.path.splitext(filepath)[1][1:].lower())
+	if not reader:
+		return {}
+	try:
+		return reader(filepath)
+	except (OSError, struct.error, IndexError):
+		return {}
+
+def CheckClip(shot):
+	# Returns (shot, errors, warnings)
+	errors = []
+	warnings = []
+
+	if ScratchSequence.Sequence(shot):
+		paths = [ScratchSequence.FramePath(shot, shot.frame_in), ScratchSequence.FramePath(shot, shot.frame_out)]
+	else:
+		paths = [shot.file]
+
+	for filepath in paths:
+		if not os.path.isfile(filepath):
+			errors.append('Missing ' + filepath)
+	if errors:
+		return shot, errors, warnings
+
+	info = Probe(paths[0])
+	if 'width' in info and shot.width and shot.height and (info['width'], info['height']) != (shot.width, shot.height):
+		warnings.append('Resolution is ' + str(info['width']) + 'x' + str(info['height']) + ' on disk and ' + str(shot.width) + 'x' + str(shot.height) + ' in the XML')
+
+	if 'fps' in info and shot.fps and abs(info['fps'] - shot.fps) > 0.01:
+		warnings.append('Frame rate is ' + str(round(info['fps'], 3)) + ' on disk and ' + str(round(shot.fps, 3)) + ' in the XML')
+
+	frames = shot.frame_out - shot.frame_in + 1
+	if 'frames' in info and frames > info['frames']:
+		warnings.append('Handles need ' + str(frames) + ' frames but the media has ' + str(info['frames']))
+
+	return shot, errors, warnings
+
+def Preflight(shots, workers=WORKERS):
+	# Check all of the clips at once, print a report, and return the clips that can be imported
+	start_time = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		results = list(pool.map(CheckClip, shots))
+
+	kept = []
+	for shot, errors, warnings in results:
+		for message in errors:
+			log.error('[Preflight] [Error] ' + shot.name + ': ' + message)
+		for message in warnings:
+			log.warning('[Preflight] [Warning] ' + shot.name + ': ' + message)
+		if not errors:
+			kept.append(shot)
+
+	log.info('[Preflight] ' + str(len(shots)) + ' clips checked in ' + str(round(time.perf_counter() - start_time, 3)) + 's, ' + str(len(shots) - len(kept)) + ' dropped')
+	return kept
@@ -0,0 +1,170 @@
+'''
+Scratch Profile
+Timing and scripting call instrumentation for the Scratch2Fusion and Scratch2Resolve scripts.
+
+When profiling is enabled with the --profile option, every fusionscript object handed out by ScratchSession is wrapped in a proxy that counts and times each call made through it, and the import stages (connecting, reading the XML, parsing shots, and the host application work) are timed separately. The results are printed as a summary table and saved to a JSON file. When profiling is off the stage timers do nothing and no objects are wrapped.
+'''
+
+import json, time, threading
+
+_enabled = False
+_start = 0.0
+_stages = {}
+_calls = {}
+# The stages and calls can be timed from several host threads at once
+_lock = threading.Lock()
+
+# Values that fusionscript passes by value, which are never wrapped
+PLAIN_TYPES = (str, bytes, int, float, bool, type(None))
+
+def Enable():
+	global _enabled, _start
+	_enabled = True
+	_start = time.perf_counter()
+	_stages.clear()
+	_calls.clear()
+
+def Enabled():
+	return _enabled
+
+def AddTime(table, name, seconds):
+	with _lock:
+		entry = table.setdefault(name, [0, 0.0])
+		entry[0] += 1
+		entry[1] += seconds
+
+class Timer:
+	def __init__(self, name):
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc_info):
+		AddTime(_stages, self.name, time.perf_counter() - self.start)
+		return False
+
+class NullTimer:
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+_null_timer = NullTimer()
+
+def Stage(name):
+	# Time a block of code: with ScratchProfile.Stage('Import'): ...
+	if not _enabled:
+		return _null_timer
+	return Timer(name)
+
+def Iterate(name, iterator):
+	# Time each step of an iterator, such as the streaming XML reader
+	if not _enabled:
+		yield from iterator
+		return
+	iterator = iter(iterator)
+	while True:
+		start = time.perf_counter()
+		try:
+			item = next(iterator)
+		except StopIteration:
+			AddTime(_stages, name, time.perf_counter() - start)
+			return
+		AddTime(_stages, name, time.perf_counter() - start)
+		yield item
+
+def Wrap(value):
+	if not _enabled or isinstance(value, PLAIN_TYPES) or isinstance(value, Proxy):
+		return value
+	if isinstance(value, list):
+		return [Wrap(item) for item in value]
+	if isinstance(value, tuple):
+		return tuple(Wrap(item) for item in value)
+	if isinstance(value, dict):
+		return dict((key, Wrap(item)) for key, item in value.items())
+	return Proxy(value)
+
+def Unwrap(value):
+	# Proxies have to be replaced by the real objects before they are passed back to fusionscript
+	if isinstance(value, Proxy):
+		return object.__getattribute__(value, '_target')
+	if isinstance(value, list):
+		return [Unwrap(item) for item in value]
+	if isinstance(value, tuple):
+		return tuple(Unwrap(item) for item in value)
+	if isinstance(value, dict):
+		return dict((key, Unwrap(item)) for key, item in value.items())
+	return value
+
+def Timed(name, function, *args):
+	start = time.perf_counter()
+	try:
+		return function(*args)
+	finally:
+		AddTime(_calls, name, time.perf_counter() - start)
+
+class Proxy:
+	# Counts and times every call made through a fusionscript object
+	def __init__(self, target):
+		object.__setattr__(self, '_target', target)
+
+	def __getattr__(self, name):
+		target = object.__getattribute__(self, '_target')
+		start = time.perf_counter()
+		value = getattr(target, name)
+		if not callable(value):
+			# Reading a property such as comp.CurrentFrame or tool.Clip is a call of its own
+			AddTime(_calls, name, time.perf_counter() - start)
+			return Wrap(value)
+
+		def Method(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return Wrap(value(*Unwrap(args), **Unwrap(kwargs)))
+			finally:
+				AddTime(_calls, name, time.perf_counter() - start)
+		return Method
+
+	def __setattr__(self, name, value):
+		Timed('Set ' + name, setattr, object.__getattribute__(self, '_target'), name, Unwrap(value))
+
+	def __getitem__(self, key):
+		return Wrap(Timed('GetInput', object.__getattribute__(self, '_target').__getitem__, key))
+
+	def __setitem__(self, key, value):
+		Timed('SetInput', object.__getattribute__(self, '_target').__setitem__, key, Unwrap(value))
+
+	def __bool__(self):
+		return bool(object.__getattribute__(self, '_target'))
+
+	def __repr__(self):
+		return repr(object.__getattribute__(self, '_target'))
+
+def Report():
+	calls = sorted(_calls.items(), key=lambda item: item[1][1], reverse=True)
+	return {
+		'wall_seconds': time.perf_counter() - _start,
+		'stages': dict((name, {'count': count, 'seconds': seconds}) for name, (count, seconds) in _stages.items()),
+		'rpc_calls': sum(count for count, seconds in _calls.values()),
+		'rpc_seconds': sum(seconds for count, seconds in _calls.values()),
+		'calls': dict((name, {'count': count, 'seconds': seconds}) for name, (count, seconds) in calls),
+	}
+
+def Save(json_path):
+	with open(json_path, 'w') as json_file:
+		json.dump(Report(), json_file, indent='\t')
+	print('[Profile Written] ' + json_path)
+
+def PrintSummary():
+	report = Report()
+	print('\n[Profile]')
+	print('%-28s %8s %12s' % ('Stage', 'Count', 'Seconds'))
+	for name, entry in report['stages'].items():
+		print('%-28s %8d %12.4f' % (name, entry['count'], entry['seconds']))
+	print('%-28s %8d %12.4f' % ('Scripting Calls', report['rpc_calls'], report['rpc_seconds']))
+	for name, entry in report['calls'].items():
+		print('  %-26s %8d %12.4f' % (name, entry['count'], entry['seconds']))
+	print('%-28s %8s %12.4f' % ('Total', '', report['wall_seconds']))
@@ -0,0 +1,133 @@
+'''
+Scratch Sequence
+Image sequence handling for the Scratch2Fusion and Scratch2Resolve scripts.
+
+Frame numbered file paths are split into a name pattern and a frame range using only the path text, so no directory listing is needed. Shots that point at the same sequence with touching or overlapping frame ranges are merged, so Fusion gets a single Loader node and Resolve a single ImportMedia clipInfo entry for them.
+
+A number at the end of a file name is only read as a frame number when the path says so (the "%04d", "####", and "[1001-1100]" forms), when the frame_file of the shot names another frame of the same file, or when shots were merged into one sequence. Any other file, like "logo_01.png" or "plate_v002.exr", is used as it is. The <file> of a shot names its first frame, so frame numbers are worked out from the number in the file name rather than from the in/out handles.
+'''
+
+import os, re
+
+# Still image formats that Scratch references as numbered frame sequences
+SEQUENCE_FORMATS = ('dpx', 'exr', 'cin', 'tif', 'tiff', 'iff', 'png', 'jpg', 'jpeg', 'tga', 'bmp', 'sgi')
+
+# Splits "name.0001.exr" into the name, frame number, and extension parts. The frame part also accepts the "[0001-0100]", "%04d", and "####" forms.
+SEQUENCE_FILE = re.compile(r'^(.*?)(\[\d+-\d+\]|%0?\d*d|#+|\d+)?(\.\w+)$')
+
+def Split(filepath):
+	# Returns (folder + name, frame text, extension) for a numbered still image, or None
+	if not filepath:
+		return None
+	folder, name = os.path.split(filepath)
+	match = SEQUENCE_FILE.match(name)
+	if not match or not match.group(2):
+		return None
+	if match.group(3)[1:].lower() not in SEQUENCE_FORMATS:
+		return None
+	return (os.path.join(folder, match.group(1)), match.group(2), match.group(3))
+
+def Padding(frame_text):
+	if frame_text.startswith('['):
+		return len(frame_text[1:].split('-')[0])
+	if frame_text.startswith('%'):
+		digits = frame_text[1:-1].lstrip('0')
+		return int(digits) if digits else 1
+	return len(frame_text)
+
+def IsFrameNumber(parts, shot):
+	# Whether the number at the end of the file name is confirmed as a frame number by the path form or the frame_file
+	head, frame_text, ext = parts
+	if not frame_text.isdigit():
+		return True
+	frame_parts = Split(shot.frame_file)
+	return bool(frame_parts) and frame_parts[0] == head and frame_parts[2] == ext and frame_parts[1] != frame_text
+
+def FrameOffset(frame_text, frame):
+	# The file frame number minus the Scratch frame number of the same frame
+	if not frame_text.isdigit() or frame is None:
+		return 0
+	return int(frame_text) - frame
+
+def Parts(shot):
+	# The possible sequence of a shot, cached on the Shot record: (head, padding, extension, frame offset, confirmed).
+	# An empty tuple means the file name has no frame number.
+	if shot.sequence is None:
+		parts = Split(shot.file)
+		if parts is not None:
+			# The file is the first frame of the shot
+			shot.sequence = (parts[0], Padding(parts[1]), parts[2], FrameOffset(parts[1], shot.frame_in), IsFrameNumber(parts, shot))
+		else:
+			# A file without a frame number, with a frame_file that names one of its frames
+			parts = Split(shot.frame_file)
+			shot.sequence = (parts[0], Padding(parts[1]), parts[2], FrameOffset(parts[1], shot.frame_no), True) if parts else ()
+	return shot.sequence
+
+def Sequence(shot):
+	# The sequence details of a shot: (head, padding, extension, frame offset), or None when the shot is not a confirmed
+	# image sequence. Shots that other shots were collapsed into are sequences.
+	parts = Parts(shot)
+	if parts and (parts[4] or shot.merged):
+		return parts[:4]
+	return None
+
+def Pattern(shot):
+	# The printf style "name.%04d.exr" path Resolve expects for an image sequence
+	sequence = Sequence(shot)
+	if not sequence:
+		return None
+	head, padding, ext, offset = sequence
+	return head + '%0' + str(padding) + 'd' + ext
+
+def FileRange(shot):
+	# The first and last file frame numbers of an image sequence shot
+	offset = Sequence(shot)[3]
+	return shot.frame_in + offset, shot.frame_out + offset
+
+def FramePath(shot, frame):
+	# The path of a single frame in the sequence
+	sequence = Sequence(shot)
+	if not sequence:
+		return shot.file
+	head, padding, ext, offset = sequence
+	return head + str(frame + offset).zfill(padding) + ext
+
+def FirstFrame(shot):
+	# Fusion Loaders are pointed at the first frame of the shot
+	if not Sequence(shot):
+		return shot.file
+	return FramePath(shot, shot.frame_in)
+
+def Collapse(shots, by_grade=False):
+	# Merge the shots that use touching or overlapping frame ranges of the same sequence. The shot that starts each run is kept and its range is extended, and the uuids of the merged shots are listed in merged.
+	# With by_grade, only shots with the same grade are merged, for hosts that grade each media node rather than each timeline clip.
+	# Shots are grouped by their possible sequence and frame offset, so only the frames of one numbering are merged
+	runs = {}
+	for shot in shots:
+		parts = Parts(shot)
+		if parts:
+			runs.setdefault(parts[:4], []).append(shot)
+
+	merged = {}
+	for sequence, run in runs.items():
+		run.sort(key=lambda shot: shot.frame_in)
+		current = None
+		for shot in run:
+			if current is not None and shot.frame_in <= current.frame_out + 1 and (not by_grade or shot.grade == current.grade):
+				if shot.frame_out > current.frame_out:
+					current.frame_out = shot.frame_out
+					current.length = current.frame_out - current.frame_in + 1
+				current.merged.append(shot.uuid)
+				continue
+			current = shot.Copy()
+			current.merged = []
+			merged[id(shot)] = current
+
+	# Keep the order the shots had in the XML document
+	result = []
+	for shot in shots:
+		if not Parts(shot):
+			result.append(shot)
+		elif id(shot) in merged:
+			result.append(merged[id(shot)])
+	return result
@@ -0,0 +1,199 @@
+'''
+Scratch Session
+Shared fusionscript connection handling for the Scratch2Fusion and Scratch2Resolve scripts.
+
+The fusionscript library is loaded once per process, each host application gets a single scriptapp connection, and the comp/project/media pool handles are cached for the rest of the run. A Pool holds a Session per host address, so the same import can be spread over several workstations or render nodes with a thread per host.
+'''
+
+import sys, os
+import importlib.machinery, importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import ScratchProfile
+from ScratchLog import log
+
+# Environment variables that point at a fusionscript library. They are checked before the install folders.
+LIB_ENV = {
+	'Fusion': 'FUSION_SCRIPT_LIB',
+	'Resolve': 'RESOLVE_SCRIPT_LIB',
+}
+
+# The fusionscript library that ships with each product, newest version first
+LIB_PATHS = {
+	'Fusion': {
+		'darwin': [
+			'/Applications/Blackmagic Fusion 19/Fusion.app/Contents/Libraries/fusionscript.so',
+			'/Applications/Blackmagic Fusion 18/Fusion.app/Contents/Libraries/fusionscript.so',
+		],
+		'win': [
+			'C:\\Program Files\\Blackmagic Design\\Fusion 19\\fusionscript.dll',
+			'C:\\Program Files\\Blackmagic Design\\Fusion 18\\fusionscript.dll',
+		],
+		'linux': [
+			'/opt/BlackmagicDesign/Fusion19/fusionscript.so',
+			'/opt/BlackmagicDesign/Fusion18/fusionscript.so',
+		],
+	},
+	'Resolve': {
+		'darwin': ['/Applications/DaVinci Resolve/DaVinci Resolve.app/Contents/Libraries/Fusion/fusionscript.so'],
+		'win': ['C:\\Program Files\\Blackmagic Design\\DaVinci Resolve\\fusionscript.dll'],
+		'linux': ['/opt/resolve/libs/Fusion/fusionscript.so'],
+	},
+}
+
+# Loaded library and open scriptapp connections, shared by every Session in the process
+_lib = None
+_apps = {}
+
+# The library path found for each product, so the install folders are only probed once
+_lib_paths = {}
+
+def LibCandidates(product):
+	candidates = []
+	env_path = os.environ.get(LIB_ENV[product])
+	if env_path:
+		candidates.append(env_path)
+	for platform_name, lib_paths in LIB_PATHS[product].items():
+		if sys.platform.startswith(platform_name):
+			candidates.extend(lib_paths)
+	return candidates
+
+def LibPath(product):
+	# The first fusionscript library on disk, or an empty string
+	if product not in _lib_paths:
+		_lib_paths[product] = next((lib_path for lib_path in LibCandidates(product) if os.path.isfile(lib_path)), '')
+	return _lib_paths[product]
+
+def FuScriptLib(product='Fusion'):
+	global _lib
+	if _lib is not None:
+		return _lib
+
+	# Reuse a fusionscript module that has already been imported in this process
+	if 'fusionscript' in sys.modules:
+		_lib = sys.modules['fusionscript']
+		return _lib
+
+	lib_path = LibPath(product)
+	if not lib_path:
+		for candidate in LibCandidates(product):
+			log.error('[' + product + ' Studio] [Library Does Not Exist on Disk] ' + candidate)
+		raise ImportError('[' + product + ' Studio] Could not locate module dependencies')
+
+	loader = importlib.machinery.ExtensionFileLoader('fusionscript', lib_path)
+	spec = importlib.util.spec_from_file_location('fusionscript', lib_path, loader=loader)
+	bmd = importlib.util.module_from_spec(spec)
+	loader.exec_module(bmd)
+	sys.modules['fusionscript'] = bmd
+
+	_lib = bmd
+	return _lib
+
+class Session:
+	def __init__(self, product='Fusion', address='localhost'):
+		self.product = product
+		self.address = address
+		self._comp = None
+		self._project = None
+		self._mediapool = None
+
+	def Lib(self):
+		return FuScriptLib(self.product)
+
+	def App(self, host=None, address=None):
+		host = host or self.product
+		address = address or self.address
+		key = (host, address)
+		app = _apps.get(key)
+		if not app:
+			if host == 'Resolve':
+				app = self.Lib().scriptapp(host)
+			else:
+				app = self.Lib().scriptapp(host, address)
+			# A failed connection is not kept, so the next call tries again once the host is running
+			if app:
+				_apps[key] = app
+		# Count and time the scripting calls when --profile is used
+		return ScratchProfile.Wrap(app)
+
+	def Comp(self):
+		# The foreground Fusion comp
+		if self._comp is None:
+			app = self.App()
+			if app:
+				self._comp = app.GetCurrentComp()
+		return self._comp
+
+	def Project(self):
+		# The current Resolve project
+		if self._project is None:
+			app = self.App()
+			if app:
+				self._project = app.GetProjectManager().GetCurrentProject()
+		return self._project
+
+	def MediaPool(self):
+		if self._mediapool is None:
+			project = self.Project()
+			if project:
+				self._mediapool = project.GetMediaPool()
+		return self._mediapool
+
+	def Reset(self):
+		# Forget the cached comp/project handles but keep the scriptapp connection open, unless the host no longer
+		# answers on it (for example after it was restarted), so the next App() call connects again
+		self._comp = None
+		self._project = None
+		self._mediapool = None
+
+		key = (self.product, self.address)
+		app = _apps.get(key)
+		if app is not None:
+			try:
+				alive = app.GetVersion()
+			except Exception:
+				alive = None
+			if not alive:
+				_apps.pop(key, None)
+
+class Pool:
+	# One Session per host address, each driven from a thread of its own
+	def __init__(self, addresses, product='Fusion'):
+		self.sessions = [Session(product, address) for address in dict.fromkeys(addresses)]
+
+	def Assign(self, jobs, weight=None):
+		# Spread the jobs over the hosts, largest first, always to the host with the least work so far
+		weight = weight or (lambda job: 1)
+		queues = [[] for session in self.sessions]
+		loads = [0] * len(self.sessions)
+		for job in sorted(jobs, key=weight, reverse=True):
+			host = loads.index(min(loads))
+			queues[host].append(job)
+			loads[host] += weight(job)
+		return queues
+
+	def Run(self, function, jobs, weight=None):
+		# Call function(session, job) for every job. The jobs of a host run in turn on its thread, and the hosts run
+		# at the same time. Returns a list of (session, job, result, error) in the order the jobs were given.
+		jobs = list(jobs)
+		if not jobs or not self.sessions:
+			return []
+		# Load the library before the threads start connecting
+		self.sessions[0].Lib()
+
+		def RunQueue(session, queue):
+			done = []
+			for job in queue:
+				try:
+					done.append((session, job, function(session, job), None))
+				except Exception as error:
+					log.error('[' + session.product + ' ' + session.address + '] ' + str(error))
+					done.append((session, job, None, error))
+			return done
+
+		with ThreadPoolExecutor(max_workers=len(self.sessions)) as pool:
+			futures = [pool.submit(RunQueue, session, queue) for session, queue in zip(self.sessions, self.Assign(jobs, weight)) if queue]
+			done = [entry for future in futures for entry in future.result()]
+
+		order = dict((id(job), index) for index, job in enumerate(jobs))
+		return sorted(done, key=lambda entry: order[id(entry[1])])
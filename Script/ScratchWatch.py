@@ -0,0 +1,132 @@
+'''
+Scratch Watch
+Watch folder daemon support for the Scratch2Fusion and Scratch2Resolve scripts.
+
+A long running process polls the Scratch LiveLink "Temp" folder for new "cmd-*.xml" files and hands them to the importer one at a time, using the host application connection that is already open. A heartbeat lock file in each watched folder lets a script started by a Scratch custom command see that a daemon is running and leave the XML file to it.
+'''
+
+import os, time, fnmatch, queue, threading
+
+from ScratchLog import log
+
+# How often the lock file is refreshed, in seconds. A lock that has not been touched for three heartbeats is stale.
+HEARTBEAT = 2.0
+
+def LockPath(folder, lock_name):
+	return os.path.join(folder, lock_name)
+
+def DaemonRunning(folder, lock_name):
+	# Check for a live watch folder daemon on this folder
+	try:
+		age = time.time() - os.path.getmtime(LockPath(folder, lock_name))
+	except OSError:
+		return False
+	return age < HEARTBEAT * 3
+
+class WatchFolder:
+	def __init__(self, folders, lock_name, pattern='cmd-*.xml', interval=0.05, settle=0.2):
+		self.lock_name = lock_name
+		self.pattern = pattern
+		# Seconds between folder scans
+		self.interval = interval
+		# Seconds a file has to stay unchanged before it is imported
+		self.settle = settle
+
+		self.folders = []
+		self.seen = {}
+		self.pending = {}
+		self.jobs = queue.Queue()
+		self.stop = threading.Event()
+		self.lock = threading.Lock()
+
+		for folder in folders:
+			self.AddFolder(folder)
+
+	def AddFolder(self, folder):
+		if not folder:
+			return False
+		folder = os.path.abspath(folder)
+		if not os.path.isdir(folder):
+			return False
+
+		with self.lock:
+			if folder in self.folders:
+				return False
+			# XML files that are already in the folder are not imported
+			for path, signature in self.Scan(folder):
+				self.seen[path] = signature
+			self.folders.append(folder)
+
+		self.Touch(folder)
+		log.info('[Watch Folder] ' + folder)
+		return True
+
+	def Scan(self, folder):
+		try:
+			with os.scandir(folder) as entries:
+				for entry in entries:
+					if fnmatch.fnmatch(entry.name, self.pattern) and entry.is_file():
+						stat = entry.stat()
+						yield entry.path, (stat.st_mtime_ns, stat.st_size)
+		except OSError:
+			return
+
+	def Poll(self):
+		now = time.monotonic()
+		with self.lock:
+			for folder in self.folders:
+				for path, signature in self.Scan(folder):
+					if self.seen.get(path) == signature:
+						continue
+					pending = self.pending.get(path)
+					if pending is None or pending[0] != signature:
+						# Restart the debounce timer while Scratch is still writing the file
+						self.pending[path] = (signature, now)
+					elif now - pending[1] >= self.settle:
+						del self.pending[path]
+						self.seen[path] = signature
+						self.jobs.put(path)
+
+	def Touch(self, folder):
+		try:
+			with open(LockPath(folder, self.lock_name), 'w') as lock_file:
+				lock_file.write(str(os.getpid()))
+		except OSError:
+			pass
+
+	def Watch(self):
+		last_beat = time.monotonic()
+		while not self.stop.is_set():
+			self.Poll()
+			if time.monotonic() - last_beat >= HEARTBEAT:
+				last_beat = time.monotonic()
+				for folder in list(self.folders):
+					self.Touch(folder)
+			self.stop.wait(self.interval)
+
+	def Run(self, handler):
+		# Import each queued XML file in order until the daemon is stopped with Ctrl+C
+		thread = threading.Thread(target=self.Watch, daemon=True)
+		thread.start()
+		log.info('[Watch Folder] Waiting for ' + self.pattern + ' files. Press Ctrl+C to stop.')
+		try:
+			while True:
+				try:
+					xml = self.jobs.get(timeout=0.5)
+				except queue.Empty:
+					continue
+				try:
+					handler(xml)
+				except Exception as error:
+					log.error('[Watch Folder] [Error] ' + xml + ': ' + str(error))
+		except KeyboardInterrupt:
+			pass
+		finally:
+			self.stop.set()
+			thread.join()
+			for folder in self.folders:
+				try:
+					os.remove(LockPath(folder, self.lock_name))
+				except OSError:
+					pass
+			log.info('[Watch Folder] Stopped')
@@ -0,0 +1,388 @@
+'''
+Scratch XML
+Streaming reader and shot records for Assimilate Scratch/LiveFX XML exports, shared by the Scratch2Fusion and Scratch2Resolve scripts.
+
+The document is read with ET.iterparse so each <shot> element is handed to the importer as soon as it is closed, and then released. Memory use stays flat on whole-Construct exports with thousands of shots.
+
+Each shot is parsed once into a compact Shot record. The frame numbers, size, and frame rate are converted to numbers, the timecode is split into its fields, and the note status becomes a NoteColor value, so the host application code never has to convert the XML text itself. The primary grade of the <colorgrade> block is read into a ScratchGrade array in the same pass.
+'''
+
+import xml.etree.ElementTree as ET
+import os, glob, enum, hashlib
+
+import ScratchProfile, ScratchGrade
+from ScratchLog import log
+
+# Bump when ParseShot() or the Shot and Project records change, so older cached parse results are not used
+PARSER_VERSION = 2
+
+# The shot fields compared by an incremental re-import, and the subset that changes the imported media
+SYNC_KEYS = ('file', 'frame_in', 'frame_out', 'note', 'note_color', 'grade')
+MEDIA_KEYS = ('file', 'frame_in', 'frame_out')
+
+class NoteColor(enum.IntEnum):
+	# The Scratch note status values
+	YELLOW = 0
+	RED = 1
+	GREEN = 2
+	BLUE = 3
+	PURPLE = 4
+	ORANGE = 5
+	CYAN = 6
+	PINK = 7
+	BLACK = 8
+	WHITE = 9
+
+class Shot:
+	# A single shot of the Scratch selection
+	__slots__ = (
+		'uuid', 'type', 'slot', 'slot_len', 'layer', 'frame_no', 'frame_file',
+		'file', 'name', 'reel_id', 'frame_in', 'frame_out', 'length',
+		'width', 'height', 'aspect', 'fps', 'timecode', 'note', 'note_color',
+		# The ScratchGrade array of the primary grade, or None when the shot is not graded
+		'grade',
+		# Filled in later: the cached image sequence parts, and the uuids of the shots collapsed into this one
+		'sequence', 'merged',
+	)
+
+	def __init__(self, **fields):
+		for name in self.__slots__:
+			setattr(self, name, fields.get(name))
+
+	@property
+	def format(self):
+		return (self.file or '')[-3:]
+
+	def Copy(self):
+		shot = Shot()
+		for name in self.__slots__:
+			setattr(shot, name, getattr(self, name))
+		return shot
+
+	def __repr__(self):
+		return 'Shot(' + ', '.join(name + '=' + repr(getattr(self, name)) for name in self.__slots__) + ')'
+
+class Project:
+	# The project, output, and selection details of a Scratch XML document
+	__slots__ = (
+		'datetime', 'version', 'name', 'project_path', 'media_path', 'temp_path', 'watch_folder',
+		'width', 'height', 'fps', 'group_name', 'construct_name',
+	)
+
+	def __init__(self, **fields):
+		for name in self.__slots__:
+			setattr(self, name, fields.get(name))
+
+	def __repr__(self):
+		return 'Project(' + ', '.join(name + '=' + repr(getattr(self, name)) for name in self.__slots__) + ')'
+
+def Children(elem):
+	# Index the direct children of an element by tag with one pass (the first element wins, like find())
+	children = {}
+	for child in elem:
+		if child.tag not in children:
+			children[child.tag] = child
+	return children
+
+def Text(children, tag, default=None):
+	child = children.get(tag)
+	if child is None or child.text is None:
+		return default
+	return child.text
+
+def Int(text, default=None):
+	if text is None:
+		return default
+	try:
+		return int(text)
+	except ValueError:
+		try:
+			return int(float(text))
+		except ValueError:
+			return default
+
+def Float(text, default=None):
+	if text is None:
+		return default
+	try:
+		return float(text)
+	except ValueError:
+		return default
+
+def Timecode(text):
+	# Split "HH:MM:SS:FF" (or "HH:MM:SS;FF" for drop frame) into a tuple of ints
+	if not text:
+		return None
+	fields = text.replace(';', ':').split(':')
+	if len(fields) != 4:
+		return None
+	try:
+		return tuple(int(field) for field in fields)
+	except ValueError:
+		return None
+
+def Channels(elem, default):
+	# The r, g, and b values of a grade control, from its attributes or from one (master) or three values in its text
+	if elem is None:
+		return (default,) * 3
+	attrib = elem.attrib
+	if attrib:
+		try:
+			return (float(attrib['r']), float(attrib['g']), float(attrib['b']))
+		except (KeyError, ValueError):
+			return tuple(Float(attrib.get(channel), default) for channel in ('r', 'g', 'b'))
+	values = [Float(value, default) for value in (elem.text or '').split()]
+	if len(values) == 1:
+		return (values[0],) * 3
+	if len(values) == 3:
+		return tuple(values)
+	return (default,) * 3
+
+def Grade(elem):
+	# Read the lift/gamma/gain (or slope/offset/power) and saturation of a <colorgrade> block into a ScratchGrade array
+	if elem is None:
+		return None
+	grade_input = elem.find('input')
+	if grade_input is None:
+		return None
+	controls = Children(grade_input)
+	saturation = Float(Text(controls, 'saturation'), 1.0)
+	if 'slope' in controls or 'offset' in controls or 'power' in controls:
+		grade = ScratchGrade.FromCDL(Channels(controls.get('slope'), 1.0), Channels(controls.get('offset'), 0.0), Channels(controls.get('power'), 1.0), saturation)
+	else:
+		grade = ScratchGrade.Grade(Channels(controls.get('lift'), 0.0), Channels(controls.get('gamma'), 1.0), Channels(controls.get('gain'), 1.0), saturation)
+	if ScratchGrade.IsIdentity(grade):
+		return None
+	return grade
+
+def SlotLength(shot):
+	# The slot_len attribute is optional, so fall back to the length of the handles range
+	return shot.slot_len or (shot.frame_out - shot.frame_in + 1)
+
+def Color(status):
+	# Status values outside of the Scratch palette are kept as plain ints so a custom palette can map them
+	value = Int(status)
+	if value is None or value not in NoteColor._value2member_map_:
+		return value
+	return NoteColor(value)
+
+def HashValue(value):
+	if value is None:
+		return ''
+	if isinstance(value, enum.Enum):
+		return str(value.value)
+	return str(value)
+
+def FileHash(path):
+	# The SHA-1 hash of a file, used to key the parse and plan caches
+	digest = hashlib.sha1()
+	with open(path, 'rb') as source:
+		for block in iter(lambda: source.read(1 << 20), b''):
+			digest.update(block)
+	return digest.hexdigest()
+
+def ShotHash(shot, keys=SYNC_KEYS):
+	# A short content hash used to spot shots that changed since they were imported
+	text = '\0'.join(HashValue(getattr(shot, key)) for key in keys)
+	return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def ParseShot(elem):
+	# Read the shot attributes and child elements in a single pass
+	attrib = elem.attrib
+	children = Children(elem)
+
+	name = Text(children, 'name') or ''
+	# Remove any version numbers scratch might have added to the name
+	idx = name.find('[')
+	if idx > 0:
+		name = name[0:idx]
+
+	handles = Children(children['handles'])
+	size = Children(children['size'])
+
+	note = ''
+	note_color = Text(children, 'note_color')
+	notes = children.get('notes')
+	if notes is not None:
+		note_elem = notes.find('note')
+		note_color = note_elem.attrib['status']
+		note = note_elem.text or ''
+
+	shot = Shot()
+	shot.uuid = attrib['uuid']
+	shot.type = attrib.get('type')
+	shot.slot = Int(attrib.get('slot'), 0)
+	shot.slot_len = Int(attrib.get('slot_len'))
+	shot.layer = Int(attrib.get('layer'), 0)
+	# Only on the first clip of the selection
+	shot.frame_no = Int(attrib.get('frame_no'))
+	shot.frame_file = attrib.get('frame_file')
+
+	shot.file = Text(children, 'file')
+	shot.name = name
+	shot.reel_id = Text(children, 'reel_id', ' ')
+	shot.frame_in = Int(Text(handles, 'in'), 0)
+	shot.frame_out = Int(Text(handles, 'out'), 0)
+	shot.length = Int(Text(children, 'length'))
+	shot.width = Int(Text(size, 'width'))
+	shot.height = Int(Text(size, 'height'))
+	shot.aspect = Float(Text(children, 'aspect'), 1.0)
+	shot.fps = Float(Text(children, 'fps'))
+	shot.timecode = Timecode(Text(children, 'timecode'))
+	shot.note = note
+	shot.note_color = Color(note_color)
+	shot.grade = Grade(children.get('colorgrade'))
+	return shot
+
+def ProjectInfo(attrib, project):
+	project.datetime = attrib['datetime']
+	project.version = attrib['version']
+	project.name = attrib['project']
+	project.project_path = attrib['project_path']
+	project.media_path = attrib['media_path']
+	project.temp_path = attrib['temp_path']
+	project.watch_folder = attrib['watch_folder'].replace('\\', '/')
+
+def OutputInfo(output, project):
+	children = Children(output)
+	outputRes = Children(children['resolution'])
+	project.width = Int(Text(outputRes, 'w'))
+	project.height = Int(Text(outputRes, 'h'))
+	project.fps = Float(Text(children, 'fps'))
+
+def IterShots(xml, project):
+	# Yields each <shot> element of the selection. The project, output, and selection details are filled in on the Project record as they are read, so they are complete before the first shot is yielded.
+	depth = 0
+	root = None
+	branch = None
+	selection = None
+
+	for event, elem in ET.iterparse(xml, events=('start', 'end')):
+		if event == 'start':
+			depth += 1
+			if depth == 1:
+				root = elem
+				ProjectInfo(elem.attrib, project)
+			elif depth == 2:
+				branch = elem
+				if elem.tag == 'selection':
+					selection = elem
+					project.group_name = elem.attrib['group']
+					project.construct_name = elem.attrib['construct']
+			continue
+
+		depth -= 1
+		if depth == 2 and elem.tag == 'shot' and branch is selection:
+			yield elem
+			# Release the finished shot
+			elem.clear()
+			selection.remove(elem)
+		elif depth == 1:
+			if elem.tag == 'output':
+				OutputInfo(elem, project)
+			elem.clear()
+			root.remove(elem)
+
+def ReadShots(xml, project):
+	# Stream and parse every shot of the selection
+	shots = []
+	for elem in ScratchProfile.Iterate('Read XML', IterShots(xml, project)):
+		with ScratchProfile.Stage('Parse Shots'):
+			shots.append(ParseShot(elem))
+	return shots
+
+def ParseXML(xml):
+	# Read a whole XML document in a worker process. The records are returned by pickling.
+	project = Project()
+	shots = [ParseShot(elem) for elem in IterShots(xml, project)]
+	return project, shots
+
+def ParseXMLs(xmls, workers=None, parse=ParseXML):
+	# Parse several XML documents at once on a process pool. Yields (xml, project, shots, error) in the order of xmls.
+	# parse() reads one document, and has to be a module level function so it can be sent to the worker processes.
+	if len(xmls) < 2:
+		for xml in xmls:
+			try:
+				project, shots = parse(xml)
+			except Exception as error:
+				yield xml, None, None, error
+			else:
+				yield xml, project, shots, None
+		return
+
+	# The process pool is only imported when it is needed, as it pulls in multiprocessing
+	from concurrent.futures import ProcessPoolExecutor
+	with ProcessPoolExecutor(max_workers=workers or min(len(xmls), os.cpu_count() or 1)) as pool:
+		futures = [pool.submit(parse, xml) for xml in xmls]
+		for xml, future in zip(xmls, futures):
+			try:
+				project, shots = future.result()
+			except Exception as error:
+				yield xml, None, None, error
+			else:
+				yield xml, project, shots, None
+
+def ReadProject(xml):
+	# The project attributes of the root element, read without parsing the rest of the document
+	for event, elem in ET.iterparse(xml, events=('start',)):
+		project = Project()
+		ProjectInfo(elem.attrib, project)
+		return project
+	return None
+
+# The number of bytes at the end of a document that Validate() reads for the closing root tag
+TAIL_SIZE = 256
+
+def ClosesRoot(xml, tag):
+	# Whether the document ends with the closing tag of its root element. A truncated document, or one that Scratch
+	# is still writing, does not.
+	with open(xml, 'rb') as handle:
+		handle.seek(0, os.SEEK_END)
+		handle.seek(max(0, handle.tell() - TAIL_SIZE))
+		tail = handle.read().rstrip()
+	return tail.endswith(b'</' + tag.encode('utf-8') + b'>')
+
+def Validate(xml):
+	# A quick check made before connecting to the host application. Only the root element and the end of the document
+	# are read, so a file that is not a Scratch XML document, is truncated, or is still being written is caught without
+	# parsing the shots. Errors within the shots are reported by the import. Raises ValueError.
+	try:
+		for event, elem in ET.iterparse(xml, events=('start',)):
+			ProjectInfo(elem.attrib, Project())
+			if ClosesRoot(xml, elem.tag):
+				return
+			raise ValueError(xml + ' is incomplete, it does not end with the closing </' + elem.tag + '> tag')
+	except OSError as error:
+		raise ValueError('Can not read ' + xml + ': ' + str(error.strerror or error))
+	except ET.ParseError as error:
+		raise ValueError(xml + ' is not a valid XML document: ' + str(error))
+	except KeyError as error:
+		raise ValueError(xml + ' is not a Scratch XML document, the ' + str(error) + ' attribute is missing')
+	raise ValueError(xml + ' is empty')
+
+def ValidXMLs(xmls):
+	# Drop and report the XML files that can not be imported
+	valid = []
+	for xml in xmls:
+		try:
+			Validate(xml)
+		except ValueError as error:
+			log.error('[XML Document] [Error] ' + str(error))
+		else:
+			valid.append(xml)
+	return valid
+
+def ExpandPaths(patterns):
+	# Expand the glob patterns given on the command line (the Windows shell leaves them as-is), keeping the order and dropping repeats
+	xmls = []
+	for pattern in patterns:
+		if any(char in pattern for char in '*?['):
+			matches = sorted(glob.glob(pattern))
+			if not matches:
+				log.warning('[XML Document] No files match ' + pattern)
+		else:
+			matches = [pattern]
+		for xml in matches:
+			if xml not in xmls:
+				xmls.append(xml)
+	return xmls